@@ -0,0 +1,178 @@
+"""Golden results: recorded paths, costs and green counts that faster engines must reproduce.
+
+Every (map, policy, start, goal) of the bundled maps and two small seeded synthetic grids
+is recorded with its path, total cost and number of green cells, as the planners engine
+(plain A*/Dijkstra for every policy) finds them. check compares an engine against the
+records under these tie rules:
+- the cost must match exactly, and the returned path must be 4-connected, start at the
+  start, end at the goal and cost exactly what the engine reports under the policy's
+  step costs;
+- Policies 1, 2, 3 and neighbor distance: any path of the recorded cost passes (another
+  equally cheap path is a legitimate tie);
+- Policy 4: the path must also visit no cell twice and hold as many green cells as the
+  recorded one, since its -green tie-break is part of the policy; only a path with
+  the same cost and green count may differ;
+- with --strict every path must be identical.
+
+Usage:
+    python benchmarks/golden.py record [-o benchmarks/golden.json]
+    python benchmarks/golden.py check [--engine planners|bidirectional|batch|tiled] [--strict]
+"""
+import argparse
+import json
+import os
+import sys
+import tempfile
+
+from suite import maps, queries  # Also puts src/ on sys.path
+
+from batch import plan_many
+from grid_map import GREEN
+from planners import engine_for, search
+from tiled_map import TiledMap, TiledPlanner, write_tiled_map
+from tracing import NULL_TRACER
+
+GOLDEN = os.path.join(os.path.dirname(os.path.abspath(__file__)), "golden.json")
+# Policy -> parameters, as benchmarks/suite.py runs them
+PARAMS = {"policy1": (), "neighbor_distance": (1,), "policy2": (), "policy3": (2,), "policy4": ()}
+SYNTHETIC_SIZES = [64]
+SYNTHETIC_DENSITIES = [(0.05, 0.01), (0.3, 0.05)]
+
+
+def run_planners(grid_map, policy, pairs):
+    results = []
+    for start, goal in pairs:
+        result = search(grid_map, policy, PARAMS[policy], start, goal, NULL_TRACER)
+        results.append((result.cost, result.path))
+    return results
+
+
+def run_bidirectional(grid_map, policy, pairs):
+    """Bidirectional search for the single-layer policies, the plain planners for Policy 4."""
+    results = []
+    for start, goal in pairs:
+        result = search(grid_map, policy, PARAMS[policy], start, goal, NULL_TRACER, bidirectional=policy != "policy4")
+        results.append((result.cost, result.path))
+    return results
+
+
+def run_batch(grid_map, policy, pairs):
+    batch = plan_many(grid_map, policy, [start + goal for start, goal in pairs], *PARAMS[policy])
+    return [(float(batch.costs[index]), batch.cells(index)) for index in range(len(batch))]
+
+
+def run_tiled(grid_map, policy, pairs, tile_size=16):
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, "map.gtil")
+        write_tiled_map(grid_map.cells, path, tile_size)
+        tiled_map = TiledMap(path, cache_tiles=8)
+        try:
+            planner = TiledPlanner(tiled_map, policy, *PARAMS[policy], cache_tiles=8)
+            return [planner.search(start, goal) for start, goal in pairs]
+        finally:
+            tiled_map.close()
+
+
+# Engine name -> run(grid_map, policy, [(start, goal), ...]) -> [(cost, path cells), ...]
+ENGINES = {"planners": run_planners, "bidirectional": run_bidirectional, "batch": run_batch, "tiled": run_tiled}
+
+
+def green_count(grid_map, path):
+    return sum(1 for row, col in path if grid_map.cells[row, col] == GREEN)
+
+
+def record(output=GOLDEN, seed=0):
+    records = []
+    for name, grid_map in maps(SYNTHETIC_SIZES, SYNTHETIC_DENSITIES, seed):
+        pairs = queries(grid_map, 2, seed)
+        for policy in PARAMS:
+            for (start, goal), (cost, path) in zip(pairs, run_planners(grid_map, policy, pairs)):
+                records.append({
+                    "map": name,
+                    "policy": policy,
+                    "start": list(start),
+                    "goal": list(goal),
+                    "cost": cost if cost != float('inf') else None,
+                    "green": green_count(grid_map, path),
+                    "path": [row * grid_map.width + col for row, col in path],  # Flat ids, start excluded
+                })
+    with open(output, "w") as f:
+        json.dump({"seed": seed, "params": PARAMS, "records": records}, f, separators=(",", ":"))
+    return len(records)
+
+
+def path_problem(grid_map, policy, start, goal, cost, path):
+    """Returns why a path is not a valid path of the given cost, or None."""
+    engine = engine_for(grid_map, policy, *PARAMS[policy])
+    node = engine.graph.node(*start)
+    total = 0
+    for row, col in path:
+        neighbor = engine.graph.node(row, col)
+        if neighbor not in engine.graph.neighbors(node):
+            return f"{engine.graph.cell(node)} -> {(row, col)} is not a step"
+        layer = engine.cost_layer[node] if engine.cost_layer is not None else 0
+        total += engine.cost[layer][neighbor]
+        node = neighbor
+    if path and tuple(path[-1]) != tuple(goal):
+        return "does not end at the goal"
+    if total != cost:
+        return f"steps add up to {total}, not {cost}"
+    if policy == "policy4" and len({tuple(cell) for cell in path} | {tuple(start)}) != len(path) + 1:
+        return "visits a cell twice"
+    return None
+
+
+def check(engine="planners", strict=False, golden=GOLDEN):
+    """Checks an engine against the records. Returns the list of failures."""
+    with open(golden) as f:
+        data = json.load(f)
+    expected = {}
+    for entry in data["records"]:
+        expected.setdefault((entry["map"], entry["policy"]), []).append(entry)
+
+    failures = []
+    for name, grid_map in maps(SYNTHETIC_SIZES, SYNTHETIC_DENSITIES, data["seed"]):
+        for policy in PARAMS:
+            entries = expected.get((name, policy), [])
+            pairs = [(tuple(entry["start"]), tuple(entry["goal"])) for entry in entries]
+            for entry, (cost, path) in zip(entries, ENGINES[engine](grid_map, policy, pairs)):
+                label = f"{name} {policy} {entry['start']}->{entry['goal']}"
+                recorded_path = [divmod(node, grid_map.width) for node in entry["path"]]
+                path = [tuple(cell) for cell in path]
+                if (None if cost == float('inf') else cost) != entry["cost"]:
+                    failures.append(f"{label}: cost {cost}, recorded {entry['cost']}")
+                elif path == recorded_path:
+                    continue
+                elif strict:
+                    failures.append(f"{label}: path differs")
+                elif entry["cost"] is not None and (problem := path_problem(grid_map, policy, entry["start"],
+                                                                               entry["goal"], cost, path)):
+                    failures.append(f"{label}: {problem}")
+                elif policy == "policy4" and green_count(grid_map, path) != entry["green"]:
+                    failures.append(f"{label}: {green_count(grid_map, path)} green cells, recorded {entry['green']}")
+    return failures
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    commands = parser.add_subparsers(dest="command", required=True)
+    record_parser = commands.add_parser("record", help="record the current planners as the golden results")
+    record_parser.add_argument("-o", "--output", default=GOLDEN)
+    check_parser = commands.add_parser("check", help="check an engine against the golden results")
+    check_parser.add_argument("--engine", default="planners", choices=list(ENGINES))
+    check_parser.add_argument("--strict", action="store_true", help="require identical paths")
+    check_parser.add_argument("--golden", default=GOLDEN)
+    args = parser.parse_args()
+
+    if args.command == "record":
+        print(f"Recorded {record(args.output)} results in {args.output}")
+        return
+    failures = check(args.engine, args.strict, args.golden)
+    for failure in failures:
+        print(failure)
+    print(f"{args.engine}: {len(failures)} failures")
+    sys.exit(1 if failures else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,47 @@
+"""Expansion counts of Policy 1 with and without uniform-rectangle jumps.
+
+Usage: python benchmarks/jump_search.py [map.txt] [queries]
+"""
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "src"))
+
+from map_io import stream_json_map  # noqa: E402
+from planners import engine_for  # noqa: E402
+from tracing import CountingTracer  # noqa: E402
+
+DEFAULT_MAP = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "maps", "map_final.txt")
+
+
+def main(path=DEFAULT_MAP, queries=200, seed=0):
+    grid_map = stream_json_map(path)
+    plain = engine_for(grid_map, "policy1")
+    jumping = engine_for(grid_map, "policy1_jumps")
+    size = plain.graph.size
+    rng = random.Random(seed)
+    corners = [0, grid_map.width - 1, size - grid_map.width, size - 1]
+    pairs = [(corners[0], corners[3]), (corners[1], corners[2])]
+    pairs += [(rng.randrange(size), rng.randrange(size)) for _ in range(queries)]
+
+    totals = {}
+    for name, engine in (("plain", plain), ("jumps", jumping)):
+        tracer = CountingTracer()
+        costs = []
+        started = time.perf_counter()
+        for start, goal in pairs:
+            costs.append(engine.search(start, goal, tracer).cost)
+        totals[name] = (tracer.expanded, time.perf_counter() - started, costs)
+
+    if totals["plain"][2] != totals["jumps"][2]:
+        raise SystemExit("Path costs differ between plain A* and jumps")
+    print(f"{os.path.basename(path)}: {grid_map.width}x{grid_map.height}, {len(pairs)} queries, equal costs")
+    for name, (expanded, seconds, _) in totals.items():
+        print(f"  {name:6} {expanded:9d} expanded ({expanded / len(pairs):.1f}/query) {seconds:.3f}s")
+    print(f"  ratio  {totals['jumps'][0] / totals['plain'][0]:.2f}")
+
+
+if __name__ == "__main__":
+    main(*(sys.argv[1:2] or [DEFAULT_MAP]), *[int(arg) for arg in sys.argv[2:3]])
@@ -0,0 +1,184 @@
+"""Headless benchmark of every policy over the bundled maps and seeded synthetic grids.
+
+Each (map, policy, query) is run twice on a fresh copy of the map, so compilation is
+always cold: once untraced for the wall time, once with a CountingTracer and
+tracemalloc for the expansion counts and the peak memory. Results are written as JSON.
+
+Usage:
+    python benchmarks/suite.py [--sizes 64 256] [--policies policy1 policy4] [-o results.json]
+    python benchmarks/suite.py --sizes 64 256 1024 4096  # The 4096² grids take much longer
+    python benchmarks/suite.py --compare old.json new.json
+"""
+import argparse
+import glob
+import json
+import os
+import platform
+import subprocess
+import sys
+import time
+import tracemalloc
+
+import numpy as np
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")
+sys.path.insert(0, os.path.join(ROOT, "src"))
+
+import planners  # noqa: E402
+from grid_map import BLACK, GREEN, YELLOW, GridMap  # noqa: E402
+from map_io import stream_json_map  # noqa: E402
+from tracing import NULL_TRACER, CountingTracer  # noqa: E402
+
+# Benchmark name -> (planner, extra keyword arguments)
+POLICIES = {
+    "policy1": (planners.find_shortest_path, {}),
+    "neighbor_distance": (planners.find_shortest_path_with_neighbor_distance, {"neighbor_distance": 1}),
+    "policy2": (planners.find_shortest_path_policy2, {}),
+    "policy3": (planners.find_shortest_path_policy3, {"yellow_cells_distance": 2}),
+    "policy4": (planners.find_shortest_path_policy4, {}),
+}
+SIZES = [64, 256, 1024]  # Larger grids only on request (--sizes)
+DENSITIES = [(0.05, 0.01), (0.2, 0.05), (0.4, 0.1)]  # (yellow, black) fractions, the rest is green
+
+
+def synthetic_map(size, yellow, black, seed):
+    """A size x size green map with seeded random yellow and black cells."""
+    rng = np.random.default_rng(seed)
+    cells = rng.choice(np.array([GREEN, YELLOW, BLACK], dtype=np.uint8), size=(size, size),
+                       p=[1 - yellow - black, yellow, black])
+    return GridMap.from_cells(cells)
+
+
+def queries(grid_map, count, seed):
+    """Both diagonals plus count seeded random (start, goal) pairs."""
+    height, width = grid_map.height, grid_map.width
+    pairs = [((0, 0), (height - 1, width - 1)), ((0, width - 1), (height - 1, 0))]
+    rng = np.random.default_rng(seed)
+    for _ in range(count):
+        start = (int(rng.integers(height)), int(rng.integers(width)))
+        goal = (int(rng.integers(height)), int(rng.integers(width)))
+        pairs.append((start, goal))
+    return pairs
+
+
+def run_one(grid_map, policy, start, goal):
+    """Times one query and measures its expansions and peak memory, each on a fresh copy of the map."""
+    planner, kwargs = POLICIES[policy]
+
+    fresh = GridMap.from_cells(grid_map.cells.copy())
+    started = time.perf_counter()
+    result = planner(fresh, start, goal, tracer=NULL_TRACER, **kwargs)
+    wall_time = time.perf_counter() - started
+
+    fresh = GridMap.from_cells(grid_map.cells.copy())
+    tracer = CountingTracer()
+    tracemalloc.start()
+    planner(fresh, start, goal, tracer=tracer, **kwargs)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    return {
+        "policy": policy,
+        "start": list(start),
+        "goal": list(goal),
+        "found": result.found,
+        "cost": result.cost if result.found else None,
+        "path_length": len(result.path_nodes()),
+        "wall_time": wall_time,
+        "compile_time": tracer.phase_times.get("compile", 0.0),
+        "search_time": tracer.phase_times.get("search", 0.0),
+        "expanded": tracer.expanded,
+        "pushes": tracer.pushes,
+        "peak_memory": peak,
+    }
+
+
+def maps(sizes, densities, seed):
+    """Yields (name, GridMap) for maps/*.txt and the synthetic grids."""
+    for path in sorted(glob.glob(os.path.join(ROOT, "maps", "*.txt"))):
+        yield os.path.join("maps", os.path.basename(path)), stream_json_map(path)
+    for size in sizes:
+        for yellow, black in densities:
+            yield f"synthetic-{size}-y{yellow}-b{black}", synthetic_map(size, yellow, black, seed)
+
+
+def git_revision():
+    try:
+        return subprocess.run(["git", "rev-parse", "HEAD"], cwd=ROOT, capture_output=True,
+                              text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def run_suite(policies, sizes, densities=DENSITIES, random_queries=2, seed=0, report=None):
+    """Runs every policy on every map and returns the JSON-ready results."""
+    results = []
+    for name, grid_map in maps(sizes, densities, seed):
+        for start, goal in queries(grid_map, random_queries, seed):
+            for policy in policies:
+                entry = {"map": name, "width": grid_map.width, "height": grid_map.height}
+                entry.update(run_one(grid_map, policy, start, goal))
+                results.append(entry)
+                if report is not None:
+                    report(entry)
+    return {
+        "revision": git_revision(),
+        "python": platform.python_version(),
+        "numpy": np.__version__,
+        "created": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "seed": seed,
+        "results": results,
+    }
+
+
+def result_key(entry):
+    return entry["map"], entry["policy"], tuple(entry["start"]), tuple(entry["goal"])
+
+
+def compare(old, new, threshold=0.1):
+    """Prints entries whose cost changed or whose wall time or expansions moved by more than threshold."""
+    old_results = {result_key(entry): entry for entry in old["results"]}
+    for entry in new["results"]:
+        before = old_results.get(result_key(entry))
+        if before is None:
+            continue
+        notes = []
+        if before["cost"] != entry["cost"]:
+            notes.append(f"cost {before['cost']} -> {entry['cost']}")
+        for field in ("wall_time", "expanded", "peak_memory"):
+            if before[field] and abs(entry[field] / before[field] - 1) > threshold:
+                notes.append(f"{field} x{entry[field] / before[field]:.2f}")
+        if notes:
+            print(f"{entry['map']} {entry['policy']} {entry['start']}->{entry['goal']}: {', '.join(notes)}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--policies", nargs="+", default=list(POLICIES), choices=list(POLICIES))
+    parser.add_argument("--sizes", nargs="*", type=int, default=SIZES)
+    parser.add_argument("--queries", type=int, default=2, help="random queries per map, on top of both diagonals")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("-o", "--output", help="JSON file to write (default: stdout)")
+    parser.add_argument("--compare", nargs=2, metavar=("OLD", "NEW"), help="diff two result files")
+    args = parser.parse_args()
+
+    if args.compare:
+        with open(args.compare[0]) as old, open(args.compare[1]) as new:
+            compare(json.load(old), json.load(new))
+        return
+
+    def report(entry):
+        print(f"{entry['map']:32} {entry['policy']:18} {entry['wall_time']:8.3f}s "
+              f"{entry['expanded']:9d} expanded {entry['peak_memory'] / 1e6:8.1f} MB cost {entry['cost']}",
+              file=sys.stderr)
+
+    suite = run_suite(args.policies, args.sizes, random_queries=args.queries, seed=args.seed, report=report)
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(suite, f, indent=1)
+    else:
+        json.dump(suite, sys.stdout, indent=1)
+
+
+if __name__ == "__main__":
+    main()
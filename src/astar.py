@@ -0,0 +1,395 @@
+"""Shared A* engine over flat node ids (row * width + col) of a 4-connected grid."""
+import heapq
+from array import array
+
+import numpy as np
+
+from tracing import NULL_TRACER
+
+INF = float('inf')
+
+
+class GridGraph:
+    """4-connected grid addressed by flat node ids."""
+
+    def __init__(self, width, height):
+        self.width = width
+        self.height = height
+        self.size = width * height
+
+    def node(self, row, col):
+        """Returns the flat id of (row, col)."""
+        return row * self.width + col
+
+    def cell(self, node):
+        """Returns the (row, col) of a flat id."""
+        return divmod(node, self.width)
+
+    def neighbors(self, node):
+        """Returns the valid neighboring nodes (up, down, left, right)."""
+        width = self.width
+        row, col = divmod(node, width)
+        neighbors = []
+        if row > 0:
+            neighbors.append(node - width)  # up
+        if row < self.height - 1:
+            neighbors.append(node + width)  # down
+        if col > 0:
+            neighbors.append(node - 1)  # left
+        if col < width - 1:
+            neighbors.append(node + 1)  # right
+        return neighbors
+
+
+class ManhattanHeuristic:
+    """Manhattan distance to the goal scaled by weight (admissible while every step costs >= weight)."""
+
+    def __init__(self, graph, weight=1):
+        self.graph = graph
+        self.weight = weight
+
+    def bind(self, goal):
+        """Returns h(node) for one goal, backed by per-row and per-column distance tables."""
+        width = self.graph.width
+        goal_row, goal_col = divmod(goal, width)
+        row_h = [self.weight * abs(row - goal_row) for row in range(self.graph.height)]
+        col_h = [self.weight * abs(col - goal_col) for col in range(width)]
+
+        def h(node):
+            row, col = divmod(node, width)
+            return row_h[row] + col_h[col]
+        return h
+
+
+class SearchResult:
+    def __init__(self, graph, start, goal, g, parent, found):
+        self.graph = graph
+        self.start_node = start
+        self.goal_node = goal
+        self.g = g  # array('d') of g-costs, INF where the node was never reached
+        self.parent = parent  # array('i') of predecessors, -1 for the start and unreached nodes
+        self.found = found
+
+    @property
+    def start(self):
+        return self.graph.cell(self.start_node)
+
+    @property
+    def goal(self):
+        return self.graph.cell(self.goal_node)
+
+    @property
+    def cost(self):
+        """Total cost of the path to the goal (INF when there is none)."""
+        return self.g[self.goal_node]
+
+    def path_nodes(self):
+        """Flat ids of the path from start to goal (start excluded, goal included)."""
+        if not self.found:
+            return []
+        nodes = []
+        current = self.goal_node
+        while current != self.start_node:
+            nodes.append(current)
+            current = self.parent[current]
+        nodes.reverse()
+        return nodes
+
+    @property
+    def path(self):
+        """The path as (row, col) tuples (start excluded, goal included)."""
+        return [self.graph.cell(node) for node in self.path_nodes()]
+
+    def reached_nodes(self):
+        """Flat ids of every node that received a g-cost."""
+        g = self.g
+        return [node for node in range(len(g)) if g[node] != INF]
+
+    @property
+    def cost_so_far(self):
+        """cell -> g-cost for every reached cell."""
+        cell = self.graph.cell
+        return {cell(node): self.g[node] for node in self.reached_nodes()}
+
+    @property
+    def came_from(self):
+        """cell -> previous cell for every reached cell (the start maps to None)."""
+        cell = self.graph.cell
+        came_from = {}
+        for node in self.reached_nodes():
+            parent = self.parent[node]
+            came_from[cell(node)] = cell(parent) if parent >= 0 else None
+        return came_from
+
+    @property
+    def chosen_neighbors(self):
+        """The best neighbor chosen for each reached cell (every cell but the start)."""
+        return {cell: parent for cell, parent in self.came_from.items() if parent is not None}
+
+
+class AStar:
+    """
+    Heap-based best-first search shared by every policy. A policy is just a configuration:
+    - cost: step cost of entering each node, shape (size,) or (layers, size)
+    - cost_layer: per-node layer index selecting the cost row used when leaving that node
+    - heuristic: admissible heuristic with bind(goal) -> h(node), None for Dijkstra
+    - tie_break: per-node gain accumulated along the path; among equal priorities the
+      larger total is popped first (Policy 4's -green ordering)
+    - relax_once: never relax a node again once it has a cost (Policy 4's visited set)
+    - views: index the arrays through memoryviews instead of copying them into lists
+      (about 4 B per cell instead of 32, no copy at all for arrays in shared memory)
+    """
+
+    def __init__(self, graph, cost, heuristic=None, tie_break=None, cost_layer=None, relax_once=False, views=False):
+        self.graph = graph
+        cost = cost.reshape(-1, graph.size)
+        self.arrays = {"cost": cost, "cost_layer": cost_layer, "tie_break": tie_break}  # Compiled inputs, kept for export
+        # Plain lists index faster than NumPy scalars; memoryviews nearly as fast without the copy
+        flat = (lambda array: memoryview(np.ascontiguousarray(array).ravel())) if views else (lambda array: array.ravel().tolist())
+        self.cost = [flat(layer) for layer in cost]
+        self.cost_layer = flat(cost_layer) if cost_layer is not None else None
+        self.heuristic = heuristic
+        self.tie_break = flat(tie_break) if tie_break is not None else None
+        self.relax_once = relax_once
+
+    def export(self):
+        """
+        Returns (arrays, options) describing this engine: the compiled NumPy arrays
+        (None for unused ones) and the plain options needed to rebuild it with from_export.
+        """
+        if self.heuristic is not None and not isinstance(self.heuristic, ManhattanHeuristic):
+            raise ValueError("Only engines with a ManhattanHeuristic can be exported")
+        options = {
+            "width": self.graph.width,
+            "height": self.graph.height,
+            "heuristic_weight": self.heuristic.weight if self.heuristic is not None else None,
+            "relax_once": self.relax_once,
+        }
+        return self.arrays, options
+
+    @classmethod
+    def from_export(cls, arrays, options):
+        """
+        Rebuilds an engine from the output of export (for example in another process).
+        The engine indexes the given arrays in place, so arrays in shared memory are
+        never copied into the process.
+        """
+        graph = GridGraph(options["width"], options["height"])
+        weight = options["heuristic_weight"]
+        return cls(graph, arrays["cost"],
+                   heuristic=ManhattanHeuristic(graph, weight) if weight is not None else None,
+                   tie_break=arrays["tie_break"],
+                   cost_layer=arrays["cost_layer"],
+                   relax_once=options["relax_once"],
+                   views=True)
+
+    def search(self, start, goal, tracer=NULL_TRACER):
+        """Searches from start to goal (flat ids) and returns a SearchResult."""
+        with tracer.phase("search"):
+            return self._search(start, goal, tracer)
+
+    def _search(self, start, goal, tracer):
+        size = self.graph.size
+        neighbors = self.graph.neighbors
+        cost = self.cost
+        cost_layer = self.cost_layer
+        tie_break = self.tie_break
+        relax_once = self.relax_once
+        h = self.heuristic.bind(goal) if self.heuristic else None
+        tracing = tracer.enabled
+        heappush = heapq.heappush
+        heappop = heapq.heappop
+
+        g = array('d', [INF]) * size
+        parent = array('i', [-1]) * size
+        closed = bytearray(size)
+        g[start] = 0
+
+        # Heap entries are (priority, node) or (priority, -tie, node) with a tie-break
+        if tie_break is not None:
+            tie = array('i', [0]) * size
+            open_list = [(0, 0, start)]
+        else:
+            open_list = [(0, start)]
+
+        step_cost = cost[0]
+        found = False
+        while open_list:
+            current = heappop(open_list)[-1]
+
+            # Skip stale entries left behind by a later, cheaper push
+            if closed[current]:
+                if tracing:
+                    tracer.on_stale(current)
+                continue
+
+            if current == goal:
+                found = True
+                break
+            closed[current] = 1
+            if tracing:
+                tracer.on_expand(current, g[current])
+
+            if cost_layer is not None:
+                step_cost = cost[cost_layer[current]]
+            current_g = g[current]
+
+            for neighbor in neighbors(current):
+                if relax_once and g[neighbor] != INF:
+                    continue
+                new_cost = current_g + step_cost[neighbor]
+                if new_cost < g[neighbor]:
+                    g[neighbor] = new_cost
+                    parent[neighbor] = current
+                    priority = new_cost + h(neighbor) if h else new_cost
+                    if tracing:
+                        tracer.on_relax(neighbor, current, new_cost, priority)
+                    if tie_break is not None:
+                        tie[neighbor] = tie[current] + tie_break[neighbor]
+                        heappush(open_list, (priority, -tie[neighbor], neighbor))
+                    else:
+                        heappush(open_list, (priority, neighbor))
+
+        return SearchResult(self.graph, start, goal, g, parent, found)
+
+    def search_bidirectional(self, start, goal, tracer=NULL_TRACER):
+        """
+        Same result cost as search, found by two searches that meet in the middle: one
+        forward from start and one backward from goal over the reversed edges. Only for
+        single-layer engines without tie-break or relax-once.
+        """
+        if self.cost_layer is not None or self.tie_break is not None or self.relax_once:
+            raise ValueError("Bidirectional search needs a single cost layer without tie-break or relax-once")
+        with tracer.phase("search"):
+            return self._search_bidirectional(start, goal, tracer)
+
+    def _search_bidirectional(self, start, goal, tracer):
+        # Both searches use the average potential p(v) = (h_goal(v) - h_start(v)) / 2: the
+        # forward keys are g + p and the backward keys g - p, so both see the same
+        # consistent reduced costs and the search can stop once the two smallest keys
+        # add up to the best path found so far (Goldberg & Harrelson).
+        size = self.graph.size
+        neighbors = self.graph.neighbors
+        step_cost = self.cost[0]
+        tracing = tracer.enabled
+        heappush = heapq.heappush
+        heappop = heapq.heappop
+        if self.heuristic is not None:
+            h_goal = self.heuristic.bind(goal)
+            h_start = self.heuristic.bind(start)
+
+            def potential(node):
+                return (h_goal(node) - h_start(node)) / 2
+        else:
+            def potential(node):
+                return 0
+
+        g = [array('d', [INF]) * size, array('d', [INF]) * size]  # Forward, backward
+        parent = [array('i', [-1]) * size, array('i', [-1]) * size]
+        closed = [bytearray(size), bytearray(size)]
+        g[0][start] = 0
+        g[1][goal] = 0
+        open_lists = [[(potential(start), start)], [(-potential(goal), goal)]]
+        best = INF if start != goal else 0
+        meeting = start
+
+        while open_lists[0] and open_lists[1]:
+            if open_lists[0][0][0] + open_lists[1][0][0] >= best:
+                break
+            side = 0 if open_lists[0][0][0] <= open_lists[1][0][0] else 1
+            sign = 1 if side == 0 else -1
+            g_side, g_other = g[side], g[1 - side]
+            current = heappop(open_lists[side])[1]
+            if closed[side][current]:
+                if tracing:
+                    tracer.on_stale(current)
+                continue
+            closed[side][current] = 1
+            if tracing:
+                tracer.on_expand(current, g_side[current])
+
+            current_g = g_side[current]
+            for neighbor in neighbors(current):
+                # Forward edges are costed by the node entered, backward ones by the node left
+                new_cost = current_g + (step_cost[neighbor] if side == 0 else step_cost[current])
+                if new_cost < g_side[neighbor]:
+                    g_side[neighbor] = new_cost
+                    parent[side][neighbor] = current
+                    priority = new_cost + sign * potential(neighbor)
+                    if tracing:
+                        tracer.on_relax(neighbor, current, new_cost, priority)
+                    heappush(open_lists[side], (priority, neighbor))
+                    if new_cost + g_other[neighbor] < best:
+                        best = new_cost + g_other[neighbor]
+                        meeting = neighbor
+
+        found = best < INF
+        forward_g, forward_parent = g[0], parent[0]
+        if found:
+            # Extend the forward tree along the backward half of the path
+            node = meeting
+            while node != goal:
+                following = parent[1][node]
+                forward_g[following] = forward_g[node] + step_cost[following]
+                forward_parent[following] = node
+                node = following
+        return SearchResult(self.graph, start, goal, forward_g, forward_parent, found)
+
+    def cost_field(self, source, reverse=False, tracer=NULL_TRACER):
+        """
+        Runs a full Dijkstra from source (a flat id) without stopping at any goal and
+        returns (g, parent) arrays over every node. With reverse=True the edges are
+        walked backwards: g[node] is the cost from node to source and parent[node] is
+        the next node towards source. The heuristic, tie-break and relax-once options
+        do not apply; the field holds the optimal costs under this engine's step costs.
+        """
+        with tracer.phase("cost_field"):
+            return self._cost_field(source, reverse, tracer)
+
+    def _cost_field(self, source, reverse, tracer):
+        size = self.graph.size
+        neighbors = self.graph.neighbors
+        cost = self.cost
+        cost_layer = self.cost_layer
+        tracing = tracer.enabled
+        heappush = heapq.heappush
+        heappop = heapq.heappop
+
+        g = array('d', [INF]) * size
+        parent = array('i', [-1]) * size
+        closed = bytearray(size)
+        g[source] = 0
+        open_list = [(0, source)]
+
+        step_cost = cost[0]
+        while open_list:
+            current_g, current = heappop(open_list)
+            if closed[current]:
+                if tracing:
+                    tracer.on_stale(current)
+                continue
+            closed[current] = 1
+            if tracing:
+                tracer.on_expand(current, current_g)
+
+            if not reverse and cost_layer is not None:
+                step_cost = cost[cost_layer[current]]
+
+            for neighbor in neighbors(current):
+                if closed[neighbor]:
+                    continue
+                if reverse:
+                    # The edge neighbor -> current, costed from the neighbor's layer
+                    if cost_layer is not None:
+                        step_cost = cost[cost_layer[neighbor]]
+                    new_cost = current_g + step_cost[current]
+                else:
+                    new_cost = current_g + step_cost[neighbor]
+                if new_cost < g[neighbor]:
+                    g[neighbor] = new_cost
+                    parent[neighbor] = current
+                    if tracing:
+                        tracer.on_relax(neighbor, current, new_cost, new_cost)
+                    heappush(open_list, (new_cost, neighbor))
+
+        return g, parent
@@ -0,0 +1,78 @@
+"""Background planning: searches run on a worker thread while the Tk main loop keeps handling events."""
+from concurrent.futures import CancelledError, ThreadPoolExecutor
+
+from planners import engine_for
+from tracing import PlanCancelled, ProgressTracer
+
+POLL_MS = 100  # How often the Tk thread checks the running search and reports its progress
+
+
+class BackgroundPlanner:
+    """
+    Runs one search at a time on a worker thread. submit() compiles (or reuses) the
+    policy's engine on the calling thread, so the worker only reads the engine's arrays,
+    which later map edits replace rather than modify, and returns the search's Future.
+    A newer submit() supersedes the running search, which stops at its next expansion.
+
+    Tk must only be touched from its own thread, so results are not delivered by the
+    worker: the Tk thread polls the future through root.after every POLL_MS, calling
+    on_progress(nodes expanded) while it runs and on_done(result) once it finishes.
+    """
+
+    def __init__(self, root, poll_ms=POLL_MS):
+        self.root = root
+        self.poll_ms = poll_ms
+        self.executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="planner")
+        self.current = None  # (future, tracer) of the latest request
+
+    def submit(self, grid_map, policy, params, start, goal, on_done, on_progress=None, bidirectional=False):
+        """Starts planning between two (row, col) cells, cancelling any search still running."""
+        engine = engine_for(grid_map, policy, *params)
+        graph = engine.graph
+        run = engine.search_bidirectional if bidirectional else engine.search
+        start_node, goal_node = graph.node(*start), graph.node(*goal)
+        return self.submit_task(lambda tracer: run(start_node, goal_node, tracer), on_done, on_progress)
+
+    def submit_task(self, task, on_done, on_progress=None):
+        """
+        Runs task(tracer) on the worker like a search, cancelling any search still running.
+        The task must only read state the Tk thread will not modify, and pass the tracer
+        to its searches so that it reports progress and can be cancelled.
+        """
+        self.cancel()
+        tracer = ProgressTracer()
+        future = self.executor.submit(task, tracer)
+        self.current = (future, tracer)
+        self.root.after(self.poll_ms, self.poll, future, tracer, on_done, on_progress)
+        return future
+
+    def poll(self, future, tracer, on_done, on_progress):
+        if self.current is None or self.current[0] is not future:
+            return  # Superseded or cancelled
+        if not future.done():
+            if on_progress is not None:
+                on_progress(tracer.expanded)
+            self.root.after(self.poll_ms, self.poll, future, tracer, on_done, on_progress)
+            return
+        self.current = None
+        try:
+            result = future.result()
+        except (PlanCancelled, CancelledError):
+            return
+        on_done(result)
+
+    def busy(self):
+        """True while a search is queued or running."""
+        return self.current is not None
+
+    def cancel(self):
+        """Stops the running search; its on_done is never called."""
+        if self.current is not None:
+            future, tracer = self.current
+            tracer.cancelled = True
+            future.cancel()
+            self.current = None
+
+    def shutdown(self):
+        self.cancel()
+        self.executor.shutdown(wait=False)
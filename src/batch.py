@@ -0,0 +1,78 @@
+"""Batch planning: many (start, goal) queries against one compiled map."""
+import numpy as np
+
+from planners import engine_for
+from tracing import NULL_TRACER
+
+
+class BatchResult:
+    """
+    Paths and costs of a batch packed into flat arrays:
+    - costs: float64 (queries,), inf where no path exists
+    - offsets: int64 (queries + 1,), path i is nodes[offsets[i]:offsets[i + 1]]
+    - nodes: int32 flat node ids (row * width + col), start excluded and goal included
+    """
+
+    def __init__(self, width, costs, offsets, nodes):
+        self.width = width
+        self.costs = costs
+        self.offsets = offsets
+        self.nodes = nodes
+
+    def __len__(self):
+        return len(self.costs)
+
+    @property
+    def found(self):
+        """Boolean mask of the queries that reached their goal."""
+        return np.isfinite(self.costs)
+
+    def path(self, index):
+        """Flat node ids of one path (a view into nodes, no copy)."""
+        return self.nodes[self.offsets[index]:self.offsets[index + 1]]
+
+    def cells(self, index):
+        """One path as (row, col) tuples."""
+        return [divmod(int(node), self.width) for node in self.path(index)]
+
+
+def pack_results(width, results):
+    """Packs (cost, path nodes) pairs into a BatchResult."""
+    costs = np.array([cost for cost, _ in results], dtype=np.float64)
+    lengths = np.array([len(nodes) for _, nodes in results], dtype=np.int64)
+    offsets = np.zeros(len(results) + 1, dtype=np.int64)
+    np.cumsum(lengths, out=offsets[1:])
+    nodes = np.fromiter((node for _, path in results for node in path), dtype=np.int32, count=int(offsets[-1]))
+    return BatchResult(width, costs, offsets, nodes)
+
+
+def as_node_pairs(grid_map, pairs):
+    """Converts ((row, col), (row, col)) pairs (or a (queries, 4) array) to (queries, 2) flat ids."""
+    pairs = np.asarray(pairs, dtype=np.int64).reshape(-1, 4)
+    if len(pairs) and ((pairs[:, 0::2] < 0).any() or (pairs[:, 0::2] >= grid_map.height).any()
+                       or (pairs[:, 1::2] < 0).any() or (pairs[:, 1::2] >= grid_map.width).any()):
+        raise ValueError("Start or goal outside the grid")
+    return np.stack([pairs[:, 0] * grid_map.width + pairs[:, 1],
+                     pairs[:, 2] * grid_map.width + pairs[:, 3]], axis=1)
+
+
+def run_queries(engine, node_pairs, tracer=NULL_TRACER):
+    """Runs every (start, goal) flat-id pair on one engine and returns (cost, path nodes) pairs."""
+    results = []
+    for start, goal in node_pairs.tolist():
+        result = engine.search(start, goal, tracer)
+        results.append((result.cost, result.path_nodes()))
+    return results
+
+
+def plan_many(grid_map, policy, pairs, *params, tracer=NULL_TRACER):
+    """
+    Plans every (start, goal) pair with one policy ("policy1", "neighbor_distance",
+    "policy2", "policy3", "policy4" plus that policy's parameters). The cost map and
+    engine are compiled once and reused by every query.
+    """
+    with tracer.phase("compile"):
+        engine = engine_for(grid_map, policy, *params)
+    node_pairs = as_node_pairs(grid_map, pairs)
+    results = run_queries(engine, node_pairs, tracer)
+    return pack_results(grid_map.width, results)
@@ -0,0 +1,270 @@
+"""Connected-component labelling of black cells on the class raster, kept up to date across edits."""
+import numpy as np
+
+from grid_map import BLACK, YELLOW
+
+NO_LABEL = -1
+FULL_RELABEL = 64  # Above this many changed black cells a full relabel is cheaper than local repairs
+
+
+def label(mask):
+    """
+    Labels the 4-connected components of a boolean mask. Returns (labels, count):
+    labels is int32 with NO_LABEL outside the mask and 0..count-1 inside, numbered in
+    row-major order of each component's first cell.
+
+    Works on horizontal runs: runs in consecutive rows that overlap are joined with
+    vectorized hooking and pointer jumping (union-find over arrays), so only the
+    number of rounds, not the number of cells, runs in Python.
+    """
+    height, width = mask.shape
+    labels = np.full((height, width), NO_LABEL, dtype=np.int32)
+    if not mask.any():
+        return labels, 0
+
+    # Runs: pad every row with a False column so no run crosses a row end
+    stride = width + 1
+    padded = np.zeros((height, stride), dtype=np.int8)
+    padded[:, :width] = mask
+    steps = np.diff(padded.ravel(), prepend=0, append=0)
+    starts = np.flatnonzero(steps == 1)  # Keys row * stride + col
+    ends = np.flatnonzero(steps == -1)  # Exclusive
+
+    # Run i overlaps the runs j of the next row with start_j < end_i and end_j > start_i
+    first = np.searchsorted(ends, starts + stride, side="right")
+    last = np.searchsorted(starts, ends + stride, side="left")
+    counts = np.maximum(last - first, 0)
+    upper = np.repeat(np.arange(len(starts)), counts)
+    lower = np.repeat(first, counts) + np.arange(counts.sum()) - np.repeat(np.cumsum(counts) - counts, counts)
+
+    # Hook every edge to the smaller root, then jump pointers, until no edge joins two roots
+    parent = np.arange(len(starts))
+    while len(upper):
+        upper_root, lower_root = parent[upper], parent[lower]
+        joined = upper_root != lower_root
+        if not joined.any():
+            break
+        upper_root, lower_root = upper_root[joined], lower_root[joined]
+        smaller = np.minimum(upper_root, lower_root)
+        np.minimum.at(parent, upper_root, smaller)
+        np.minimum.at(parent, lower_root, smaller)
+        while True:
+            jumped = parent[parent]
+            if (jumped == parent).all():
+                break
+            parent = jumped
+        upper, lower = upper[joined], lower[joined]
+
+    # Roots are the first run of each component, so their order is row-major
+    roots = np.flatnonzero(parent == np.arange(len(parent)))
+    rank = np.empty(len(parent), dtype=np.int32)
+    rank[roots] = np.arange(len(roots), dtype=np.int32)
+    lengths = ends - starts
+    labels.ravel()[np.flatnonzero(mask.ravel())] = np.repeat(rank[parent], lengths)
+    return labels, len(roots)
+
+
+class Clusters:
+    """
+    Black clusters of a GridMap and the yellow cells around them, as count_clusters
+    defines them: each 4-connected group of black cells, with every yellow cell that
+    touches it, a yellow cell touching several clusters going to the first one in
+    row-major order. Only clusters with at least one yellow cell count.
+
+    The label raster is repaired locally when a few cells changed since the last
+    update() (merging labels when a black cell joins clusters, relabelling only the
+    bounding box of a cluster that lost a cell); the per-cluster summaries are then
+    recomputed with array operations.
+    """
+
+    def __init__(self, grid_map):
+        self.grid_map = grid_map
+        self.version = None
+        self.black = None
+        self.labels = None
+        self.next_label = 0
+        self.boxes = None  # (labels, 4) top, left, bottom, right per label, inclusive; stale for merged labels
+        self.summary = None
+        self.update()
+
+    def update(self):
+        """Brings the labels up to date with the map. Returns the number of black cells that changed."""
+        if self.version == self.grid_map.version:
+            return 0
+        black = self.grid_map.cells == BLACK
+        self.version = self.grid_map.version
+        self.summary = None
+        if self.black is None or self.black.shape != black.shape:
+            changed = black.size
+        else:
+            changed_cells = np.flatnonzero(self.black != black)
+            changed = len(changed_cells)
+            if changed <= FULL_RELABEL:
+                width = black.shape[1]
+                for node in changed_cells.tolist():
+                    row, col = divmod(node, width)
+                    self.black[row, col] = black[row, col]
+                    if black[row, col]:
+                        self.add_cell(row, col)
+                    else:
+                        self.remove_cell(row, col)
+                return changed
+        self.relabel(black)
+        return changed
+
+    def relabel(self, black):
+        self.black = black.copy()
+        self.labels, self.next_label = label(black)
+        self.boxes = np.empty((max(self.next_label, 1), 4), dtype=np.int64)
+        self.boxes[:, :2] = np.iinfo(np.int64).max
+        self.boxes[:, 2:] = -1
+        rows, cols = np.nonzero(black)
+        cell_labels = self.labels[rows, cols]
+        np.minimum.at(self.boxes[:, 0], cell_labels, rows)
+        np.minimum.at(self.boxes[:, 1], cell_labels, cols)
+        np.maximum.at(self.boxes[:, 2], cell_labels, rows)
+        np.maximum.at(self.boxes[:, 3], cell_labels, cols)
+
+    def new_label(self, top, left, bottom, right):
+        """Allocates a label with its bounding box, growing the box table by doubling."""
+        if self.next_label == len(self.boxes):
+            self.boxes = np.concatenate([self.boxes, np.empty_like(self.boxes)])
+        self.boxes[self.next_label] = top, left, bottom, right
+        self.next_label += 1
+        return self.next_label - 1
+
+    def neighbor_labels(self, row, col):
+        height, width = self.labels.shape
+        found = []
+        for neighbor_row, neighbor_col in ((row - 1, col), (row + 1, col), (row, col - 1), (row, col + 1)):
+            if 0 <= neighbor_row < height and 0 <= neighbor_col < width:
+                value = int(self.labels[neighbor_row, neighbor_col])
+                if value != NO_LABEL and value not in found:
+                    found.append(value)
+        return found
+
+    def add_cell(self, row, col):
+        """A cell turned black: start a cluster or join (and merge) the touching ones."""
+        touching = self.neighbor_labels(row, col)
+        if not touching:
+            self.labels[row, col] = self.new_label(row, col, row, col)
+            return
+        # Relabel the smaller clusters into the one with the largest bounding box
+        keep = max(touching, key=self.area)
+        box = self.boxes[keep]
+        for other in touching:
+            if other == keep:
+                continue
+            top, left, bottom, right = self.boxes[other].tolist()
+            window = self.labels[top:bottom + 1, left:right + 1]
+            window[window == other] = keep
+            box[:] = min(box[0], top), min(box[1], left), max(box[2], bottom), max(box[3], right)
+        self.labels[row, col] = keep
+        box[:] = min(box[0], row), min(box[1], col), max(box[2], row), max(box[3], col)
+
+    def remove_cell(self, row, col):
+        """A black cell was repainted: relabel its cluster's bounding box, which may split it."""
+        old = int(self.labels[row, col])
+        self.labels[row, col] = NO_LABEL
+        top, left, bottom, right = self.boxes[old].tolist()
+        window = self.labels[top:bottom + 1, left:right + 1]
+        members = window == old
+        if not members.any():
+            return
+        parts, count = label(members)
+        for part in range(count):
+            part_rows, part_cols = np.nonzero(parts == part)
+            box = (top + int(part_rows.min()), left + int(part_cols.min()),
+                   top + int(part_rows.max()), left + int(part_cols.max()))
+            if part == 0:
+                value = old
+                self.boxes[old] = box
+            else:
+                value = self.new_label(*box)
+            window[part_rows, part_cols] = value
+
+    def area(self, value):
+        top, left, bottom, right = self.boxes[value].tolist()
+        return (bottom - top + 1) * (right - left + 1)
+
+    def summarize(self):
+        """Per-cluster arrays, computed once per map version."""
+        self.update()
+        if self.summary is not None:
+            return self.summary
+        width = self.labels.shape[1]
+        flat_labels = self.labels.ravel()
+        black_nodes = np.flatnonzero(flat_labels != NO_LABEL)
+        black_labels = flat_labels[black_nodes]
+
+        # Number clusters by their first cell in row-major order, like a scan would find them
+        unique, first_index = np.unique(black_labels, return_index=True)
+        clusters = len(unique)
+        rank = np.zeros(max(self.next_label, 1), dtype=np.int32)
+        rank[unique] = np.argsort(np.argsort(black_nodes[first_index], kind="stable"), kind="stable")
+        black_rank = rank[black_labels]
+
+        # Every yellow cell goes to the lowest-ranked cluster among its black neighbors
+        ranks = np.full(self.labels.shape, clusters, dtype=np.int32)
+        ranks.ravel()[black_nodes] = black_rank
+        owner = np.full(self.labels.shape, clusters, dtype=np.int32)
+        np.minimum(owner[1:], ranks[:-1], out=owner[1:])
+        np.minimum(owner[:-1], ranks[1:], out=owner[:-1])
+        np.minimum(owner[:, 1:], ranks[:, :-1], out=owner[:, 1:])
+        np.minimum(owner[:, :-1], ranks[:, 1:], out=owner[:, :-1])
+        del ranks
+        yellow_nodes = np.flatnonzero((self.grid_map.cells.ravel() == YELLOW) & (owner.ravel() < clusters))
+        yellow_rank = owner.ravel()[yellow_nodes]
+        del owner
+
+        # Group the cells of each cluster together (row-major inside a cluster)
+        black_order = np.argsort(black_rank, kind="stable")
+        black_nodes, black_rank = black_nodes[black_order], black_rank[black_order]
+        yellow_order = np.argsort(yellow_rank, kind="stable")
+        yellow_nodes = yellow_nodes[yellow_order]
+        black_counts = np.bincount(black_rank, minlength=clusters)
+        yellow_counts = np.bincount(yellow_rank, minlength=clusters)
+        boxes = np.zeros((clusters, 4), dtype=np.int64)
+        if clusters:
+            rows, cols = np.divmod(black_nodes, width)
+            black_starts = np.cumsum(black_counts) - black_counts
+            boxes[:, 0] = np.minimum.reduceat(rows, black_starts)
+            boxes[:, 1] = np.minimum.reduceat(cols, black_starts)
+            boxes[:, 2] = np.maximum.reduceat(rows, black_starts)
+            boxes[:, 3] = np.maximum.reduceat(cols, black_starts)
+
+        # Only clusters that kept a yellow cell count
+        kept = np.flatnonzero(yellow_counts > 0)
+        self.summary = {
+            "black_nodes": black_nodes,
+            "black_offsets": np.concatenate([[0], np.cumsum(black_counts)]),
+            "yellow_nodes": yellow_nodes,
+            "yellow_offsets": np.concatenate([[0], np.cumsum(yellow_counts)]),
+            "kept": kept,
+            "boxes": boxes[kept],
+            "sizes": black_counts[kept],
+        }
+        return self.summary
+
+    def __len__(self):
+        return len(self.summarize()["kept"])
+
+    def black_cells(self, index):
+        """Flat indices of a cluster's black cells, row-major (a view, no copy)."""
+        summary = self.summarize()
+        cluster = summary["kept"][index]
+        return summary["black_nodes"][summary["black_offsets"][cluster]:summary["black_offsets"][cluster + 1]]
+
+    def yellow_cells(self, index):
+        """Flat indices of the yellow cells assigned to a cluster, row-major (a view, no copy)."""
+        summary = self.summarize()
+        cluster = summary["kept"][index]
+        return summary["yellow_nodes"][summary["yellow_offsets"][cluster]:summary["yellow_offsets"][cluster + 1]]
+
+    def bounding_box(self, index):
+        """(top, left, bottom, right) of a cluster's black cells, inclusive."""
+        return tuple(int(value) for value in self.summarize()["boxes"][index])
+
+    def size(self, index):
+        """Number of black cells in a cluster."""
+        return int(self.summarize()["sizes"][index])
@@ -0,0 +1,113 @@
+"""Single-source cost fields: one full Dijkstra answers queries to every cell."""
+from collections import OrderedDict
+
+import numpy as np
+
+from planners import engine_for
+from tracing import NULL_TRACER
+
+
+class CostField:
+    """
+    g-costs and predecessors over the whole map from one source cell. A forward field
+    holds the cost from the source to every cell; a reverse field holds the cost from
+    every cell to the source (the destination), with parent pointing at the next hop.
+    """
+
+    def __init__(self, graph, source, g, parent, reverse=False):
+        self.graph = graph
+        self.source_node = source
+        self.reverse = reverse
+        self.g = g  # array('d'), INF where unreachable
+        self.parent = parent  # array('i'), -1 for the source and unreachable cells
+
+    @property
+    def source(self):
+        return self.graph.cell(self.source_node)
+
+    @property
+    def costs(self):
+        """The g-costs as a (height, width) float64 array (a view, no copy)."""
+        return np.frombuffer(self.g, dtype=np.float64).reshape(self.graph.height, self.graph.width)
+
+    def cost_to(self, cell):
+        """Cost between the source and cell (inf if unreachable)."""
+        return self.g[self.graph.node(*cell)]
+
+    def path_nodes(self, cell):
+        """
+        Flat ids of the path between the source and cell, in travel order: source to cell
+        for a forward field, cell to source for a reverse one (first cell excluded, last
+        included). Empty if cell is unreachable. O(path length).
+        """
+        node = self.graph.node(*cell)
+        if self.g[node] == float('inf'):
+            return []
+        nodes = []
+        if self.reverse:
+            while node != self.source_node:
+                node = self.parent[node]
+                nodes.append(node)
+        else:
+            while node != self.source_node:
+                nodes.append(node)
+                node = self.parent[node]
+            nodes.reverse()
+        return nodes
+
+    def path_to(self, cell):
+        """The path between the source and cell as (row, col) tuples (see path_nodes)."""
+        return [self.graph.cell(node) for node in self.path_nodes(cell)]
+
+    def closest(self, cells):
+        """Returns the cheapest of several cells (None if none is reachable)."""
+        best = min(cells, key=self.cost_to, default=None)
+        if best is None or self.cost_to(best) == float('inf'):
+            return None
+        return best
+
+    def class_count(self, grid_map, cell, cell_class):
+        """Counts the cells of cell_class on the path between the source and cell."""
+        cells = grid_map.cells.ravel()
+        return sum(1 for node in self.path_nodes(cell) if cells[node] == cell_class)
+
+
+class CostFieldCache:
+    """Cost fields keyed by (map version, policy, parameters, source, direction), least recently used dropped first."""
+
+    def __init__(self, max_entries=16):
+        self.max_entries = max_entries
+        self.fields = OrderedDict()
+
+    @staticmethod
+    def key(grid_map, policy, params, source, reverse=False):
+        return (id(grid_map), grid_map.version, policy, tuple(params), tuple(source), reverse)
+
+    def peek(self, grid_map, policy, params, source, reverse=False):
+        """Returns the cached field, or None without computing it."""
+        key = self.key(grid_map, policy, params, source, reverse)
+        field = self.fields.get(key)
+        if field is not None:
+            self.fields.move_to_end(key)
+        return field
+
+    def put(self, key, field):
+        self.fields[key] = field
+        self.fields.move_to_end(key)
+        if len(self.fields) > self.max_entries:
+            self.fields.popitem(last=False)
+
+    def get(self, grid_map, policy, params, source, reverse=False, tracer=NULL_TRACER):
+        """Returns the cost field from (or, with reverse=True, to) the source cell, computing it on a miss."""
+        field = self.peek(grid_map, policy, params, source, reverse)
+        if field is None:
+            field = compute_field(engine_for(grid_map, policy, *params), source, reverse, tracer)
+            self.put(self.key(grid_map, policy, params, source, reverse), field)
+        return field
+
+
+def compute_field(engine, source, reverse=False, tracer=NULL_TRACER):
+    """Runs the full Dijkstra of a cost field on a compiled engine (source is a (row, col) cell)."""
+    source_node = engine.graph.node(*source)
+    g, parent = engine.cost_field(source_node, reverse, tracer)
+    return CostField(engine.graph, source_node, g, parent, reverse)
@@ -0,0 +1,50 @@
+"""Cost map compiler: turns a map plus a policy's weights into a dense float32 step-cost array."""
+import numpy as np
+
+from grid_map import YELLOW
+
+
+def class_cost(cells, weights, default_weight):
+    """Returns the cost of stepping into each cell, looked up from its class in one pass."""
+    table = np.full(256, default_weight, dtype=np.float32)  # One entry per possible uint8 class
+    for cell_class, weight in weights.items():
+        table[cell_class] = weight
+    return table[cells]
+
+
+def box_count(mask, radius):
+    """
+    Counts the True cells in the (2 * radius + 1)² window around every cell (box filter
+    over a summed-area table). Windows are clipped at the grid border.
+    """
+    height, width = mask.shape
+    summed = np.zeros((height + 1, width + 1), dtype=np.int32)
+    np.cumsum(np.cumsum(mask, axis=0, dtype=np.int32), axis=1, out=summed[1:, 1:])
+
+    rows = np.arange(height)
+    cols = np.arange(width)
+    top = np.clip(rows - radius, 0, height)[:, None]
+    bottom = np.clip(rows + radius + 1, 0, height)[:, None]
+    left = np.clip(cols - radius, 0, width)[None, :]
+    right = np.clip(cols + radius + 1, 0, width)[None, :]
+    return summed[bottom, right] - summed[top, right] - summed[bottom, left] + summed[top, left]
+
+
+def yellow_neighbor_penalty(cells, neighbor_distance, penalty):
+    """Adds penalty for every yellow cell within neighbor_distance (the cell itself excluded)."""
+    yellow = cells == YELLOW
+    count = box_count(yellow, neighbor_distance) - yellow
+    return (count * penalty).astype(np.float32)
+
+
+def proximity_penalty(distance_field, penalties):
+    """Adds penalties[d] to every cell whose distance field value is d."""
+    extra = np.zeros(distance_field.shape, dtype=np.float32)
+    for distance, penalty in penalties.items():
+        extra[distance_field == distance] = penalty
+    return extra
+
+
+def within_distance_penalty(distance_field, distance, penalty):
+    """Adds penalty to every cell closer than distance."""
+    return np.where(distance_field < distance, penalty, 0).astype(np.float32)
@@ -0,0 +1,186 @@
+"""Headless grid model: cell classes stored in a compact uint8 raster."""
+import numpy as np
+
+# Cell classes stored in the raster
+WHITE = 0
+GREEN = 1
+YELLOW = 2
+BLACK = 3
+RED = 4
+BLUE = 5
+OTHER = 6  # Any color without a class of its own (robot, destination, custom picks)
+
+# Color string -> cell class (colors as written by save_grid / the color chooser)
+PALETTE = {
+    "white": WHITE,
+    "green": GREEN,
+    "#fefb00": YELLOW,  # Hex code for yellow
+    "#000000": BLACK,
+    "black": BLACK,
+    "#ff2600": RED,     # Trajectory 1
+    "#0432ff": BLUE,    # Trajectory 2
+}
+
+# Cell class -> color string used to paint the canvas
+CLASS_COLORS = {
+    WHITE: "white",
+    GREEN: "green",
+    YELLOW: "#fefb00",
+    BLACK: "#000000",
+    RED: "#ff2600",
+    BLUE: "#0432ff",
+    OTHER: "white",
+}
+
+FAR = 2 ** 30  # Distance reported when the map has no cell of the requested class
+
+MANHATTAN = "manhattan"
+CHEBYSHEV = "chebyshev"
+
+
+def color_to_class(color):
+    """Returns the cell class for a color string (OTHER if it has no class)."""
+    return PALETTE.get(color, OTHER)
+
+
+class GridMap:
+    def __init__(self, width, height, fill=WHITE, cells=None):
+        self.width = width
+        self.height = height
+        self.cells = np.full((height, width), fill, dtype=np.uint8) if cells is None else cells
+        self.version = 0  # Bumped on every edit so derived layers know when to rebuild
+        self._distance_fields = {}  # (cell_class, metric) -> cached distance field
+        self._derived = {}  # key -> (version, layer) for layers rebuilt after any edit
+
+    @classmethod
+    def from_colors(cls, grid_data, width=None, height=None):
+        """Builds a map from a JSON list-of-lists of color strings (the save_grid format)."""
+        height = len(grid_data) if height is None else height
+        width = len(grid_data[0]) if width is None else width
+        grid_map = cls(width, height)
+        grid_map.load_colors(grid_data)
+        return grid_map
+
+    @classmethod
+    def from_cells(cls, cells):
+        """Wraps an existing (height, width) uint8 raster without copying it (e.g. a numpy.memmap)."""
+        height, width = cells.shape
+        return cls(width, height, cells=cells)
+
+    def load_cells(self, cells):
+        """Overwrites the raster with the top-left width x height window of another raster."""
+        self.cells[:] = WHITE
+        window = cells[:self.height, :self.width]
+        self.cells[:window.shape[0], :window.shape[1]] = window
+        self.version += 1
+        self._distance_fields.clear()
+
+    def load_colors(self, grid_data):
+        """Overwrites the raster with the top-left width x height window of grid_data."""
+        for row in range(self.height):
+            self.cells[row] = [color_to_class(color) for color in grid_data[row][:self.width]]
+        self.version += 1
+        self._distance_fields.clear()
+
+    def to_colors(self):
+        """Returns the raster as a list-of-lists of color strings."""
+        return [[CLASS_COLORS[cell] for cell in row] for row in self.cells.tolist()]
+
+    def in_bounds(self, row, col):
+        """Checks if the row and column are within the grid bounds."""
+        return 0 <= row < self.height and 0 <= col < self.width
+
+    def get(self, row, col):
+        """Returns the cell class at (row, col)."""
+        return int(self.cells[row, col])
+
+    def set(self, row, col, cell_class):
+        """Paints a single cell."""
+        old_class = int(self.cells[row, col])
+        if old_class == cell_class:
+            return
+        self.cells[row, col] = cell_class
+        self.version += 1
+
+        # Only the fields of the two classes involved can change
+        for key in list(self._distance_fields):
+            if key[0] in (old_class, cell_class):
+                del self._distance_fields[key]
+
+    def fill(self, cell_class):
+        """Paints every cell with the same class."""
+        self.cells.fill(cell_class)
+        self.version += 1
+        self._distance_fields.clear()
+
+    def neighbors(self, row, col):
+        """Returns the valid neighboring cells (up, down, left, right)."""
+        neighbors = []
+        for d_row, d_col in [(-1, 0), (1, 0), (0, -1), (0, 1)]:  # up, down, left, right
+            neighbor_row, neighbor_col = row + d_row, col + d_col
+            if 0 <= neighbor_row < self.height and 0 <= neighbor_col < self.width:
+                neighbors.append((neighbor_row, neighbor_col))
+        return neighbors
+
+    def positions(self, cell_class):
+        """Returns the (row, col) of every cell of the given class in row-major order."""
+        rows, cols = np.nonzero(self.cells == cell_class)
+        return list(zip(rows.tolist(), cols.tolist()))
+
+    def derived(self, key, build):
+        """Returns build(self), cached under key until the next edit of the map."""
+        entry = self._derived.get(key)
+        if entry is None or entry[0] != self.version:
+            entry = (self.version, build(self))
+            self._derived[key] = entry
+        return entry[1]
+
+    def distance_field(self, cell_class, metric=MANHATTAN):
+        """
+        Returns an int32 (height, width) array with the distance from every cell to the
+        nearest cell of cell_class (0 on those cells, FAR if the map has none).
+        The field is computed once and cached until a cell of that class is painted over
+        or a cell is painted with that class.
+        """
+        key = (cell_class, metric)
+        field = self._distance_fields.get(key)
+        if field is None:
+            field = distance_transform(self.cells == cell_class, metric)
+            field.setflags(write=False)  # Shared by every planner, so keep it read-only
+            self._distance_fields[key] = field
+        return field
+
+
+def distance_transform(mask, metric=MANHATTAN):
+    """
+    Distance from every cell to the nearest True cell of mask, as a multi-source BFS over
+    the obstacle-free grid finds it: MANHATTAN 4-connected (up, down, left, right),
+    CHEBYSHEV 8-connected. Both run as separable sweeps in O(cells).
+    """
+    height, width = mask.shape
+    if not mask.any():
+        return np.full((height, width), FAR, dtype=np.int32)
+
+    if metric not in (MANHATTAN, CHEBYSHEV):
+        raise ValueError(f"Unknown distance metric: {metric}")
+
+    # Without obstacles both distances are separable: a forward and a backward sweep
+    # along the rows give each cell its distance to the nearest source in its own row
+    field = np.where(mask, 0, FAR).astype(np.int32)
+    for col in range(1, width):
+        np.minimum(field[:, col], field[:, col - 1] + 1, out=field[:, col])
+    for col in range(width - 2, -1, -1):
+        np.minimum(field[:, col], field[:, col + 1] + 1, out=field[:, col])
+
+    # Then sweeps along the columns: one step per row for the L1 distance; for Chebyshev
+    # every shortest 8-connected path can run along the source's row first and then
+    # change row at each step, so the diagonal neighbors of the previous row count too
+    diagonal = metric == CHEBYSHEV
+    for rows in (range(1, height), range(height - 2, -1, -1)):
+        for row in rows:
+            previous = field[row - rows.step] + 1
+            np.minimum(field[row], previous, out=field[row])
+            if diagonal:
+                np.minimum(field[row, 1:], previous[:-1], out=field[row, 1:])
+                np.minimum(field[row, :-1], previous[1:], out=field[row, :-1])
+    return field
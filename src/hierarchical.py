@@ -0,0 +1,304 @@
+"""Hierarchical pathfinding (HPA*): search an abstract sector graph first, then refine inside its corridor."""
+import heapq
+
+import numpy as np
+
+from astar import INF
+from planners import engine_for
+from tracing import NULL_TRACER
+
+LONG_RUN = 6  # Border runs at least this long get a transition at both ends instead of one in the middle
+
+
+class HierarchicalPlanner:
+    """
+    HPA* (Botea et al.) over a policy's compiled step costs. The grid is cut into
+    sector_size x sector_size sectors; every border between two sectors is split into
+    runs of cells with the same step costs and each run gets one or two transitions.
+    Intra-sector costs between the transitions of a sector are found with a Dijkstra
+    restricted to that sector. A query searches this abstract graph, then runs A* on
+    the full grid restricted to the sectors the abstract path crosses.
+
+    gap bounds the result: with gap=g the returned cost is at most (1 + g) times the
+    optimum. After refining, an A* over the whole grid runs until every open entry has
+    f >= cost / (1 + g) (a certified lower bound) or it reaches the goal itself. gap=None
+    skips the check and returns the corridor path as is. The check is not bounded by
+    the sectors, so for a small gap it expands about as many nodes as a plain A*
+    query and the hierarchy saves little: use gap for verification, gap=None for speed.
+    This uses the policy's optimal costs: Policy 4's relax-once and
+    green tie-break options are not applied.
+    """
+
+    def __init__(self, grid_map, policy, *params, sector_size=16, gap=None, tracer=NULL_TRACER):
+        self.grid_map = grid_map
+        self.policy = policy
+        self.params = params
+        self.sector_size = sector_size
+        self.gap = gap
+        self.tracer = tracer
+        self.version = None
+        self.cost_arrays = None
+        self.layer_array = None
+        self.borders = {}  # (sector, next sector) -> list of (node, node) transitions
+        self.intra = {}  # sector -> {entrance: [(entrance, cost), ...]}
+        self.inter = {}  # entrance -> [(entrance across the border, cost), ...]
+        self.rebuild()
+
+    def load_engine(self):
+        """Fetches the policy's compiled engine for the current map version."""
+        engine = engine_for(self.grid_map, self.policy, *self.params)
+        self.graph = engine.graph
+        self.version = self.grid_map.version
+        self.cost = engine.cost
+        self.cost_layer = engine.cost_layer
+        self.cost_arrays = engine.arrays["cost"]
+        layers = engine.arrays["cost_layer"]
+        self.layer_array = layers.ravel() if layers is not None else None
+        # Manhattan distance scaled by the cheapest step is admissible for any policy
+        self.h_weight = float(self.cost_arrays.min())
+
+    def step_cost(self, node, neighbor):
+        """Cost of stepping from node into neighbor."""
+        layer = self.cost_layer[node] if self.cost_layer is not None else 0
+        return self.cost[layer][neighbor]
+
+    def h(self, node, goal):
+        width = self.graph.width
+        node_row, node_col = divmod(node, width)
+        goal_row, goal_col = divmod(goal, width)
+        return self.h_weight * (abs(node_row - goal_row) + abs(node_col - goal_col))
+
+    def sector_of(self, node):
+        row, col = divmod(node, self.graph.width)
+        return row // self.sector_size, col // self.sector_size
+
+    def bounds(self, sector):
+        """(first row, end row, first col, end col) of a sector."""
+        size = self.sector_size
+        top, left = sector[0] * size, sector[1] * size
+        return top, min(top + size, self.graph.height), left, min(left + size, self.graph.width)
+
+    def sectors(self):
+        size = self.sector_size
+        return [(sector_row, sector_col)
+                for sector_row in range(-(-self.graph.height // size))
+                for sector_col in range(-(-self.graph.width // size))]
+
+    def adjacent(self, sector):
+        """The sectors sharing a border with sector."""
+        size = self.sector_size
+        sector_rows, sector_cols = -(-self.graph.height // size), -(-self.graph.width // size)
+        sector_row, sector_col = sector
+        return [(row, col) for row, col in ((sector_row - 1, sector_col), (sector_row + 1, sector_col),
+                                            (sector_row, sector_col - 1), (sector_row, sector_col + 1))
+                if 0 <= row < sector_rows and 0 <= col < sector_cols]
+
+    def rebuild(self):
+        """
+        Builds the abstract graph, or updates it for the sectors whose cells changed cost
+        since the last build. Returns the number of sectors rebuilt.
+        """
+        if self.version == self.grid_map.version:
+            return 0
+        old_costs, old_layers = self.cost_arrays, self.layer_array
+        self.load_engine()
+
+        with self.tracer.phase("compile"):
+            if old_costs is None or old_costs.shape != self.cost_arrays.shape:
+                self.borders, self.intra = {}, {}
+                dirty = set(self.sectors())
+            else:
+                changed = (old_costs != self.cost_arrays).any(axis=0)
+                if old_layers is not None:
+                    changed |= old_layers != self.layer_array
+                dirty = {self.sector_of(node) for node in np.nonzero(changed)[0].tolist()}
+
+            for sector in dirty:
+                for neighbor in self.adjacent(sector):
+                    first, second = min(sector, neighbor), max(sector, neighbor)
+                    self.borders[(first, second)] = self.find_transitions(first, second)
+            # The entrances of a dirty sector's neighbors moved too, so their intra edges are redone
+            touched = dirty.union(*(self.adjacent(sector) for sector in dirty))
+            for sector in touched:
+                self.intra[sector] = self.connect(sector)
+
+            if dirty:
+                self.inter = {}
+                for transitions in self.borders.values():
+                    for first, second in transitions:
+                        self.inter.setdefault(first, []).append((second, self.step_cost(first, second)))
+                        self.inter.setdefault(second, []).append((first, self.step_cost(second, first)))
+        return len(dirty)
+
+    def find_transitions(self, first, second):
+        """Transition pairs across the border between two adjacent sectors (first above or left of second)."""
+        width = self.graph.width
+        top, bottom, left, right = self.bounds(first)
+        if first[0] == second[0]:
+            pairs = [(row * width + right - 1, row * width + right) for row in range(top, bottom)]
+        else:
+            pairs = [((bottom - 1) * width + col, bottom * width + col) for col in range(left, right)]
+
+        # Split the border into runs whose cells have the same costs on both sides
+        layers = range(len(self.cost))
+        signatures = [tuple(self.cost[layer][node] for layer in layers for node in pair) for pair in pairs]
+        transitions = []
+        begin = 0
+        for end in range(1, len(pairs) + 1):
+            if end < len(pairs) and signatures[end] == signatures[begin]:
+                continue
+            if end - begin >= LONG_RUN:
+                transitions += [pairs[begin], pairs[end - 1]]
+            else:
+                transitions.append(pairs[(begin + end - 1) // 2])
+            begin = end
+        return transitions
+
+    def entrances(self, sector):
+        """The transition cells inside a sector."""
+        cells = set()
+        for neighbor in self.adjacent(sector):
+            transitions = self.borders.get((min(sector, neighbor), max(sector, neighbor)), [])
+            cells.update(node for pair in transitions for node in pair if self.sector_of(node) == sector)
+        return sorted(cells)
+
+    def connect(self, sector):
+        """Intra-sector costs between every pair of the sector's entrances."""
+        entrances = self.entrances(sector)
+        edges = {}
+        for entrance in entrances:
+            costs = self.sector_costs(entrance, sector)
+            edges[entrance] = [(other, costs[other]) for other in entrances if other != entrance and other in costs]
+        return edges
+
+    def sector_costs(self, source, sector, reverse=False):
+        """
+        Dijkstra restricted to one sector. Returns {node: cost} from source, or with
+        reverse=True the cost from every node to source.
+        """
+        width = self.graph.width
+        neighbors = self.graph.neighbors
+        top, bottom, left, right = self.bounds(sector)
+        g = {source: 0}
+        done = set()
+        open_list = [(0, source)]
+        while open_list:
+            current_g, current = heapq.heappop(open_list)
+            if current in done:
+                continue
+            done.add(current)
+            for neighbor in neighbors(current):
+                row, col = divmod(neighbor, width)
+                if not (top <= row < bottom and left <= col < right):
+                    continue
+                step = self.step_cost(neighbor, current) if reverse else self.step_cost(current, neighbor)
+                new_cost = current_g + step
+                if new_cost < g.get(neighbor, INF):
+                    g[neighbor] = new_cost
+                    heapq.heappush(open_list, (new_cost, neighbor))
+        return g
+
+    def abstract_path(self, start, goal):
+        """Abstract nodes from start to goal, or None if the goal cannot be reached."""
+        start_sector, goal_sector = self.sector_of(start), self.sector_of(goal)
+        from_start = self.sector_costs(start, start_sector)
+        to_goal = self.sector_costs(goal, goal_sector, reverse=True)
+        start_edges = [(entrance, from_start[entrance]) for entrance in self.entrances(start_sector)]
+        if goal in from_start:
+            start_edges.append((goal, from_start[goal]))
+        goal_entrances = set(self.entrances(goal_sector))
+
+        g = {start: 0}
+        parent = {start: None}
+        closed = set()
+        open_list = [(self.h(start, goal), start)]
+        while open_list:
+            current = heapq.heappop(open_list)[1]
+            if current == goal:
+                path = []
+                while current is not None:
+                    path.append(current)
+                    current = parent[current]
+                return path[::-1]
+            if current in closed:
+                continue
+            closed.add(current)
+
+            if current == start:
+                # A start on an entrance also steps straight across its border
+                edges = start_edges + self.inter.get(start, [])
+            else:
+                edges = self.intra[self.sector_of(current)].get(current, []) + self.inter.get(current, [])
+            if current in goal_entrances and current in to_goal:
+                edges = edges + [(goal, to_goal[current])]
+            for neighbor, cost in edges:
+                new_cost = g[current] + cost
+                if new_cost < g.get(neighbor, INF):
+                    g[neighbor] = new_cost
+                    parent[neighbor] = current
+                    heapq.heappush(open_list, (new_cost + self.h(neighbor, goal), neighbor))
+        return None
+
+    def grid_search(self, start, goal, corridor=None, bound=INF):
+        """
+        A* on the full grid. corridor restricts it to a set of sectors. The search also
+        stops once the smallest f left open reaches bound. Returns (cost, parent):
+        cost is INF if the goal was not reached.
+        """
+        tracer = self.tracer
+        neighbors = self.graph.neighbors
+        g = {start: 0}
+        parent = {start: -1}
+        closed = set()
+        open_list = [(self.h(start, goal), start)]
+        while open_list:
+            f, current = heapq.heappop(open_list)
+            if f >= bound:
+                break
+            if current == goal:
+                return g[goal], parent
+            if current in closed:
+                if tracer.enabled:
+                    tracer.on_stale(current)
+                continue
+            closed.add(current)
+            if tracer.enabled:
+                tracer.on_expand(current, g[current])
+            for neighbor in neighbors(current):
+                if corridor is not None and self.sector_of(neighbor) not in corridor:
+                    continue
+                new_cost = g[current] + self.step_cost(current, neighbor)
+                if new_cost < g.get(neighbor, INF):
+                    g[neighbor] = new_cost
+                    parent[neighbor] = current
+                    priority = new_cost + self.h(neighbor, goal)
+                    if tracer.enabled:
+                        tracer.on_relax(neighbor, current, new_cost, priority)
+                    heapq.heappush(open_list, (priority, neighbor))
+        return INF, parent
+
+    def plan(self, start, goal):
+        """Returns (cost, path cells) from start to goal (start excluded), rebuilding edited sectors first."""
+        self.rebuild()
+        start, goal = self.graph.node(*start), self.graph.node(*goal)
+        with self.tracer.phase("search"):
+            abstract = self.abstract_path(start, goal)
+            if abstract is None:
+                return INF, []
+            corridor = {self.sector_of(node) for node in abstract}
+            cost, parent = self.grid_search(start, goal, corridor)
+
+            if self.gap is not None:
+                exact_cost, exact_parent = self.grid_search(start, goal, bound=cost / (1 + self.gap))
+                if exact_cost < cost:
+                    cost, parent = exact_cost, exact_parent
+        if cost == INF:
+            return INF, []
+
+        path = []
+        node = goal
+        while node != start:
+            path.append(self.graph.cell(node))
+            node = parent[node]
+        path.reverse()
+        return cost, path
@@ -0,0 +1,178 @@
+"""Incremental replanning with D* Lite: repairs the previous search after map edits or robot moves."""
+import heapq
+from array import array
+
+import numpy as np
+
+from astar import INF
+from planners import engine_for
+from tracing import NULL_TRACER
+
+
+def supports(engine):
+    """True if D* Lite plans with the engine's costs: one cost layer, no tie-break and no relax-once rule."""
+    return engine.cost_layer is None and engine.tie_break is None and not engine.relax_once
+
+
+class DStarLite:
+    """
+    D* Lite (Koenig & Likhachev) over a policy's compiled step costs. The search runs
+    backwards from the goal, so moving the start only shifts the key modifier km, and
+    repainting cells only reopens the nodes whose edge costs actually changed.
+    Only policies that supports() accepts can be repaired this way: Policy 4's layered
+    costs, relax-once rule and green tie-break need a full search.
+    """
+
+    def __init__(self, grid_map, policy, params, start, goal, tracer=NULL_TRACER):
+        self.grid_map = grid_map
+        self.policy = policy
+        self.params = tuple(params)
+        self.tracer = tracer
+        self.load_engine()
+        if not supports(self.engine):
+            raise ValueError(f"D* Lite cannot repair {policy} plans")
+        self.reset(self.graph.node(*start), self.graph.node(*goal))
+
+    def reset(self, start, goal):
+        """Drops all search state and starts over between two flat ids."""
+        graph = self.graph
+        self.start = start
+        self.goal = goal
+        self.last_start = start
+        self.km = 0
+        # Manhattan distance scaled by the cheapest step stays consistent for any policy
+        self.h_weight = float(self.cost_arrays.min())
+
+        self.g = array('d', [INF]) * graph.size
+        self.rhs = array('d', [INF]) * graph.size
+        self.rhs[self.goal] = 0
+        self.open_keys = {}  # node -> key of its live heap entry
+        self.open_list = []
+        self.push(self.goal)
+
+    def load_engine(self):
+        """Fetches the policy's compiled engine for the current map version."""
+        engine = engine_for(self.grid_map, self.policy, *self.params)
+        self.engine = engine
+        self.graph = engine.graph
+        self.version = self.grid_map.version
+        self.cost = engine.cost[0]
+        self.cost_arrays = engine.arrays["cost"]
+
+    def step_cost(self, node, neighbor):
+        """Cost of stepping from node into neighbor."""
+        return self.cost[neighbor]
+
+    def h(self, node):
+        width = self.graph.width
+        node_row, node_col = divmod(node, width)
+        start_row, start_col = divmod(self.start, width)
+        return self.h_weight * (abs(node_row - start_row) + abs(node_col - start_col))
+
+    def key(self, node):
+        best = min(self.g[node], self.rhs[node])
+        return (best + self.h(node) + self.km, best)
+
+    def push(self, node):
+        key = self.key(node)
+        self.open_keys[node] = key
+        heapq.heappush(self.open_list, (key, node))
+
+    def top(self):
+        """Returns (key, node) of the best live open entry, dropping stale ones."""
+        open_list = self.open_list
+        while open_list:
+            key, node = open_list[0]
+            if self.open_keys.get(node) == key:
+                return key, node
+            heapq.heappop(open_list)
+            if self.tracer.enabled:
+                self.tracer.on_stale(node)
+        return (INF, INF), None
+
+    def update_vertex(self, node):
+        if node != self.goal:
+            self.rhs[node] = min((self.step_cost(node, successor) + self.g[successor]
+                                  for successor in self.graph.neighbors(node)), default=INF)
+        self.open_keys.pop(node, None)
+        if self.g[node] != self.rhs[node]:
+            self.push(node)
+
+    def compute_shortest_path(self):
+        tracer = self.tracer
+        with tracer.phase("search"):
+            while True:
+                top_key, node = self.top()
+                start = self.start
+                if node is None or (top_key >= self.key(start) and self.rhs[start] == self.g[start]):
+                    break
+                heapq.heappop(self.open_list)
+                del self.open_keys[node]
+
+                new_key = self.key(node)
+                if top_key < new_key:
+                    self.push(node)
+                elif self.g[node] > self.rhs[node]:
+                    self.g[node] = self.rhs[node]
+                    if tracer.enabled:
+                        tracer.on_expand(node, self.g[node])
+                    for predecessor in self.graph.neighbors(node):
+                        self.update_vertex(predecessor)
+                else:
+                    self.g[node] = INF
+                    if tracer.enabled:
+                        tracer.on_expand(node, self.g[node])
+                    self.update_vertex(node)
+                    for predecessor in self.graph.neighbors(node):
+                        self.update_vertex(predecessor)
+
+    def move_start(self, cell):
+        """The robot moved: only the key modifier changes."""
+        node = self.graph.node(*cell)
+        if node != self.start:
+            self.start = node
+            self.km += self.h(self.last_start)  # h is measured from the new start
+            self.last_start = node
+
+    def update_map(self):
+        """Picks up repainted cells: reopens only the nodes whose edges changed cost."""
+        if self.grid_map.version == self.version:
+            return 0
+        old_costs = self.cost_arrays
+        self.load_engine()
+
+        # A cheaper step than the heuristic assumed would make the queued keys inconsistent
+        if self.cost_arrays.min() < self.h_weight:
+            self.reset(self.start, self.goal)
+            return self.graph.size
+
+        # Cells whose entry cost changed invalidate the edges into them
+        entered = np.nonzero((old_costs != self.cost_arrays).any(axis=0))[0]
+
+        changed = set()
+        for node in entered.tolist():
+            changed.update(self.graph.neighbors(node))
+        for node in changed:
+            self.update_vertex(node)
+        return len(entered)
+
+    def plan(self):
+        """Repairs the search and returns (cost, path cells) from the start to the goal (start excluded)."""
+        self.update_map()
+        return self.search()
+
+    def search(self):
+        """
+        Like plan() without picking up map edits first, so it only touches the planner's
+        own state and the engine's arrays and can run on a worker thread.
+        """
+        self.compute_shortest_path()
+        if self.g[self.start] == INF:
+            return INF, []
+
+        path = []
+        node = self.start
+        while node != self.goal and len(path) < self.graph.size:
+            node = min(self.graph.neighbors(node), key=lambda successor: self.step_cost(node, successor) + self.g[successor])
+            path.append(self.graph.cell(node))
+        return self.g[self.start], path
@@ -0,0 +1,177 @@
+"""Jumps across uniform-cost rectangles: an A* fast path for large single-color regions."""
+import heapq
+from array import array
+
+import numpy as np
+
+from astar import INF, AStar, SearchResult
+
+
+def uniform_rectangles(cost, width, height):
+    """
+    Greedily splits the grid into rectangles of equal step cost, row by row: each run of
+    unassigned equal-cost cells starts a rectangle that grows down while the run repeats.
+    Returns (rect_of, rects): the rectangle index of every node and (top, left, bottom,
+    right, cost) per rectangle, bounds inclusive.
+    """
+    cost = np.asarray(cost).reshape(height, width)
+    rect_of = np.full((height, width), -1, dtype=np.int32)
+    rects = []
+    for row in range(height):
+        free = rect_of[row] < 0
+        # Runs break wherever the cost changes or an assigned cell interrupts them
+        breaks = np.ones(width + 1, dtype=bool)
+        breaks[1:width] = (cost[row, 1:] != cost[row, :-1]) | (free[1:] != free[:-1])
+        edges = np.flatnonzero(breaks)
+        for left, end in zip(edges[:-1].tolist(), edges[1:].tolist()):
+            if not free[left]:
+                continue
+            value = cost[row, left]
+            bottom = row
+            while (bottom + 1 < height and (rect_of[bottom + 1, left:end] < 0).all()
+                   and (cost[bottom + 1, left:end] == value).all()):
+                bottom += 1
+            rect_of[row:bottom + 1, left:end] = len(rects)
+            rects.append((row, left, bottom, end - 1, float(value)))
+    return memoryview(rect_of.ravel()), rects  # 4 B per cell, no per-cell Python objects
+
+
+def piece(value, low, high, cuts):
+    """The part of [low, high] holding value once it is cut at each of cuts (each cut is a piece of its own)."""
+    for cut in cuts:
+        if cut == value:
+            return value, value
+        if cut < value:
+            low = max(low, cut + 1)
+        else:
+            high = min(high, cut - 1)
+    return low, high
+
+
+class JumpAStar(AStar):
+    """
+    A* with rectangular symmetry reduction for single-layer cost maps. Inside a
+    rectangle of equal step costs every monotone path between two border cells costs
+    the same, so the search never enters a rectangle's interior: border cells step
+    along the border or jump straight across to the opposite side in one macro edge.
+    This is the 4-connected, weighted counterpart of Jump Point Search: expansions in
+    open uniform areas drop to the rectangle borders, and the search falls back to
+    plain expansion wherever the cost changes (rectangles of width or height below 3
+    have no interior). The rectangles holding the start or the goal are cut along
+    their rows and columns so neither ends up inside an interior. Costs are identical
+    to AStar; among equally cheap paths it may pick another one, so it is opt-in
+    (planners' "policy1_jumps") rather than the Policy 1 engine.
+    """
+
+    def __init__(self, graph, cost, heuristic=None, **options):
+        super().__init__(graph, cost, heuristic, **options)
+        self.rectangles = None  # Built on the first search
+
+    def _search(self, start, goal, tracer):
+        graph = self.graph
+        width = graph.width
+        neighbors = graph.neighbors
+        step_cost = self.cost[0]
+        h = self.heuristic.bind(goal) if self.heuristic else None
+        tracing = tracer.enabled
+        heappush = heapq.heappush
+        heappop = heapq.heappop
+
+        if self.rectangles is None:
+            self.rectangles = uniform_rectangles(self.arrays["cost"][0], width, graph.height)
+        rect_of, rects = self.rectangles
+        # The rectangles holding the start or the goal are cut along their rows and columns
+        cuts = {}
+        for node in (start, goal):
+            row, col = divmod(node, width)
+            rows, cols = cuts.setdefault(rect_of[node], ([], []))
+            rows.append(row)
+            cols.append(col)
+
+        g = array('d', [INF]) * graph.size
+        parent = array('i', [-1]) * graph.size
+        closed = bytearray(graph.size)
+        g[start] = 0
+        open_list = [(0, start)]
+
+        found = False
+        while open_list:
+            current = heappop(open_list)[1]
+            if closed[current]:
+                if tracing:
+                    tracer.on_stale(current)
+                continue
+            if current == goal:
+                found = True
+                break
+            closed[current] = 1
+            if tracing:
+                tracer.on_expand(current, g[current])
+            current_g = g[current]
+
+            rect = rect_of[current]
+            top, left, bottom, right, rect_cost = rects[rect]
+            row, col = divmod(current, width)
+            if rect in cuts:
+                rows, cols = cuts[rect]
+                top, bottom = piece(row, top, bottom, rows)
+                left, right = piece(col, left, right, cols)
+            successors = []
+            if bottom - top < 2 or right - left < 2:
+                for neighbor in neighbors(current):
+                    successors.append((neighbor, step_cost[neighbor]))
+            else:
+                for neighbor in neighbors(current):
+                    neighbor_row, neighbor_col = divmod(neighbor, width)
+                    if top < neighbor_row < bottom and left < neighbor_col < right:
+                        continue  # Interior cells are covered by the jumps
+                    successors.append((neighbor, step_cost[neighbor]))
+                if left < col < right:
+                    if row == top:
+                        successors.append((bottom * width + col, rect_cost * (bottom - top)))
+                    elif row == bottom:
+                        successors.append((top * width + col, rect_cost * (bottom - top)))
+                if top < row < bottom:
+                    if col == left:
+                        successors.append((row * width + right, rect_cost * (right - left)))
+                    elif col == right:
+                        successors.append((row * width + left, rect_cost * (right - left)))
+
+            for neighbor, cost in successors:
+                new_cost = current_g + cost
+                if new_cost < g[neighbor]:
+                    g[neighbor] = new_cost
+                    parent[neighbor] = current
+                    priority = new_cost + h(neighbor) if h else new_cost
+                    if tracing:
+                        tracer.on_relax(neighbor, current, new_cost, priority)
+                    heappush(open_list, (priority, neighbor))
+
+        if found:
+            self.unroll(start, goal, g, parent)
+        return SearchResult(graph, start, goal, g, parent, found)
+
+    def unroll(self, start, goal, g, parent):
+        """Fills in the cells skipped by jumps on the final path, so parents are single steps again."""
+        width = self.graph.width
+        step_cost = self.cost[0]
+        node = goal
+        while node != start:
+            previous = parent[node]
+            row, col = divmod(node, width)
+            previous_row, previous_col = divmod(previous, width)
+            if abs(row - previous_row) + abs(col - previous_col) > 1:
+                step = width * ((row > previous_row) - (row < previous_row)) + (col > previous_col) - (col < previous_col)
+                cell = previous + step
+                while cell != node:
+                    g[cell] = g[cell - step] + step_cost[cell]
+                    parent[cell] = cell - step
+                    cell += step
+                parent[node] = node - step
+            node = previous
+
+    def export(self):
+        """Marks the export so from_export elsewhere rebuilds a JumpAStar."""
+        arrays, options = super().export()
+        options["jumps"] = True
+        return arrays, options
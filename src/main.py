@@ -2,27 +2,60 @@ import tkinter as tk
 from tkinter import filedialog, colorchooser
 import json
 import os
-import heapq
+
+import numpy as np
+
+import map_io
+import planners
+from background import BackgroundPlanner
+from clusters import Clusters
+from cost_field import CostFieldCache, compute_field
+from incremental import DStarLite, supports
+from render import GridRenderer
+from grid_map import GridMap, WHITE, BLACK, RED, BLUE, color_to_class
+from tour import plan_tour, sample_waypoints
+from trajectory import Trajectory, order_segments
+
+TOUR_SPACING = 5  # Plan Tour visits every 5th cell of the painted trajectories
+MAX_CANVAS_SIZE = 1000  # Pixels; larger maps are scrolled and zoomed in a viewport of this size
+
+# Dropdown entry -> (planner policy name, policy parameters)
+POLICY_CHOICES = {
+    "Policy 1": ("policy1", ()),
+    "Policy 2": ("neighbor_distance", (1,)),
+    "Policy 3": ("policy4", ()),
+}
 
 class GridApp:
     def __init__(self, root, width, height, default_map=None):
         self.root = root
         self.width = width
         self.height = height
-        self.cell_size = 50
+        self.cell_size = 50  # Pixels per cell at the initial zoom, if the map fits the view
         self.current_color = "white"  # Default color
         self.robot_color = "blue"  # Robot color
         self.destination_color = "purple"  # Destination color
-        self.grid = [[None for _ in range(width)] for _ in range(height)]
         self.original_colors = [[self.current_color for _ in range(width)] for _ in range(height)]  # Store original colors
+        self.grid_map = GridMap(width, height, fill=WHITE)  # Cell classes read by the planners
+        self.clusters = None  # Black clusters, built on the first count and kept up to date across edits
+        self.cost_fields = CostFieldCache()  # Full cost fields from the robot, reused by hover queries
+        self.active_policy = None  # (policy, params) of the plan on screen, repaired on every edit
+        self.incremental = None  # D* Lite state kept between replans
+        self.planner = BackgroundPlanner(root)  # Runs the dropdown's searches off the Tk thread
+        self.field_planner = BackgroundPlanner(root)  # Computes hover cost fields without blocking the plans
+        self.pending_field = None  # Cache key of the cost field being computed for hover
+        self.hovered_cell = None
+        self.plan_costs = None  # (g-costs as a height x width array, start, goal) of the last plan, shown lazily
+        self.current_trajectory = []
+        self.trajectory_index = 0
         self.robot_start_position = (3, 2) # (1,1)  # Store original robot position
         self.robot_position = self.robot_start_position  # Current robot position
         self.destination_position = (8, 8)  # Initial destination position
-        self.trajectory_1 = []  # List for trajectory 1 (red)
-        self.trajectory_2 = []  # List for trajectory 2 (blue)
+        self.trajectory_1 = []  # Segments of trajectory 1 (red)
+        self.trajectory_2 = []  # Segments of trajectory 2 (blue)
         self.create_widgets()
         self.create_controls()
-        self.path = []
+        self.path = Trajectory(width)
         self.default_map = default_map
         self.text_ids = []
 
@@ -37,27 +70,26 @@ class GridApp:
             self.place_destination()
 
     def create_widgets(self):
-        self.canvas = tk.Canvas(self.root, width=self.width*self.cell_size, height=self.height*self.cell_size)
-        self.canvas.pack()
-
-        # Initialize an empty 2D grid (a list of lists) to store the rectangle and text item references
-        self.grid = [[None for _ in range(self.width)] for _ in range(self.height)]
-        for row in range(self.height):
-            row_items = []  # Will hold the text IDs for this row
-            for col in range(self.width):
-                x1 = col * self.cell_size
-                y1 = row * self.cell_size
-                x2 = x1 + self.cell_size
-                y2 = y1 + self.cell_size
-                # Create the rectangle for the grid cell and store the reference in self.grid[row][col]
-                rect_id = self.canvas.create_rectangle(x1, y1, x2, y2, fill="white", outline="black")
-                
-                # Create a text item for displaying values and store the reference in self.grid[row][col]
-                text_id = self.canvas.create_text((x1 + x2) / 2, (y1 + y2) / 2, text="", font=("Arial", 12))
-                
-                # Store both rectangle and text references in self.grid[row][col]
-                self.grid[row][col] = (rect_id, text_id) 
-
+        # The canvas is a viewport: its size depends on the screen budget, not the map size
+        view_width = min(self.width * self.cell_size, MAX_CANVAS_SIZE)
+        view_height = min(self.height * self.cell_size, MAX_CANVAS_SIZE)
+        view_frame = tk.Frame(self.root)
+        view_frame.pack()
+        self.canvas = tk.Canvas(view_frame, width=view_width, height=view_height, highlightthickness=0)
+        self.canvas.grid(row=0, column=0)
+        x_scrollbar = tk.Scrollbar(view_frame, orient=tk.HORIZONTAL)
+        x_scrollbar.grid(row=1, column=0, sticky="ew")
+        y_scrollbar = tk.Scrollbar(view_frame, orient=tk.VERTICAL)
+        y_scrollbar.grid(row=0, column=1, sticky="ns")
+
+        # Cell fills and texts go through the renderer, which draws the visible changes once per frame
+        self.renderer = GridRenderer(self.canvas, self.width, self.height, view_width, view_height, self.cell_size)
+        self.renderer.attach_scrollbars(x_scrollbar, y_scrollbar)
+
+        # Mouse wheel zooms around the pointer
+        self.canvas.bind("<MouseWheel>", self.renderer.on_wheel)
+        self.canvas.bind("<Button-4>", self.renderer.on_wheel)
+        self.canvas.bind("<Button-5>", self.renderer.on_wheel)
 
         self.canvas.bind("<Button-1>", self.on_canvas_click)
         self.canvas.bind("<Motion>", self.on_mouse_motion)
@@ -66,6 +98,11 @@ class GridApp:
         self.info_label = tk.Label(self.root, text="", bg="white")
         self.info_label.pack()
 
+        # Progress of the search running in the background
+        self.status_label = tk.Label(self.root, text="")
+        self.status_label.pack()
+        self.root.protocol("WM_DELETE_WINDOW", self.close)
+
         self.menu = tk.Menu(self.root)
         self.root.config(menu=self.menu)
         
@@ -80,18 +117,17 @@ class GridApp:
         self.color_menu.add_command(label="Fill with Green", command=self.fill_with_green)
         self.color_menu.add_command(label="Fill with White", command=self.fill_with_white)
 
-    def reorder_trajectory(self, trajectory):
-        def is_adjacent(p1, p2):
-            return (p1[0] == p2[0] and abs(p1[1] - p2[1]) == 1) or (p1[1] == p2[1] and abs(p1[0] - p2[0]) == 1)
-
-        # Create adjacency dictionary
-        adjacency_dict = {}
-        for i, point in enumerate(trajectory):
-            adjacency_dict[point] = []
-            for j, other_point in enumerate(trajectory):
-                if i != j and is_adjacent(point, other_point):
-                    adjacency_dict[point].append(other_point)
+        self.view_menu = tk.Menu(self.menu, tearoff=0)
+        self.menu.add_cascade(label="View", menu=self.view_menu)
+        self.heatmap_var = tk.BooleanVar(self.root, value=False)
+        self.view_menu.add_checkbutton(label="Cost Heatmap", variable=self.heatmap_var, command=self.show_heatmap)
 
+    def reorder_trajectory(self, trajectory):
+        """
+        Orders painted trajectory cells into segments of adjacent cells, the first one
+        starting at the cell closest to the robot. Broken or branched trajectories come
+        back as several segments.
+        """
         # Find the starting point based on adjacency to robot position
         robot_row, robot_col = self.robot_position
         adjacent_cells = [
@@ -104,80 +140,70 @@ class GridApp:
         # Filter adjacent cells that are within grid range
         adjacent_cells = [(row, col) for row, col in adjacent_cells if 0 <= row < self.height and 0 <= col < self.width]
 
-        def distance(p1, p2):
-            return abs(p1[0] - p2[0]) + abs(p1[1] - p2[1])
-
-        def find_closest_start_index():
-            min_dist = float('inf')
-            start_index = 0
-            for i, point in enumerate(trajectory):
-                for adj in adjacent_cells:
-                    dist = distance(point, adj)
-                    if dist < min_dist:
-                        min_dist = dist
-                        start_index = i
-            return start_index
-
-        start_index = find_closest_start_index()
-
-        # Reorder trajectory starting from the closest point
-        ordered_trajectory = trajectory[start_index:] + trajectory[:start_index]
-
-        # Adjust trajectory according to adjacency
-        ordered_trajectory_final = []
-        used_points = set()
-        current_point = ordered_trajectory[0]
-        ordered_trajectory_final.append(current_point)
-        used_points.add(current_point)
-
-        while len(ordered_trajectory_final) < len(ordered_trajectory):
-            next_point = None
-            for adj in adjacency_dict[current_point]:
-                if adj not in used_points:
-                    next_point = adj
-                    break
-            if next_point:
-                ordered_trajectory_final.append(next_point)
-                used_points.add(next_point)
-                current_point = next_point
-            else:
-                break
-
-        # Add remaining points if there are any left
-        for point in ordered_trajectory:
-            if point not in used_points:
-                ordered_trajectory_final.append(point)
+        def distance_to_robot(point):
+            return min((abs(point[0] - row) + abs(point[1] - col) for row, col in adjacent_cells), default=0)
 
-        return ordered_trajectory_final
+        start = min(trajectory, key=distance_to_robot, default=None)
+        return order_segments(trajectory, start)
 
     def on_canvas_click(self, event):
-        col = event.x // self.cell_size
-        row = event.y // self.cell_size
-        if 0 <= col < self.width and 0 <= row < self.height:
-
-
-            rect_id, _ = self.grid[row][col]  # Extract the rectangle ID
-            self.canvas.itemconfig(rect_id, fill=self.current_color)  # Configure the rectangle's color
+        cell = self.renderer.cell_at(event.x, event.y)
+        if cell is not None:
+            row, col = cell
+            self.renderer.set_fill(row, col, self.current_color)  # Repaint the cell on the next frame
 
             self.original_colors[row][col] = self.current_color  # Save the color change
+            self.grid_map.set(row, col, color_to_class(self.current_color))
+
+            # Repair the plan on screen around the repainted cell
+            self.replan()
 
     def get_cell_color(self, row, col):
         """Returns the current color of the cell at the given (row, col) coordinates."""
         if 0 <= row < self.height and 0 <= col < self.width:
-            return self.canvas.itemcget(self.grid[row][col][0], "fill")
+            return self.renderer.fill(row, col)
         else:
             return None  # Coordinates out of bounds
 
     def on_mouse_motion(self, event):
-        col = event.x // self.cell_size
-        row = event.y // self.cell_size
-        if 0 <= col < self.width and 0 <= row < self.height:
-            color = self.canvas.itemcget(self.grid[row][col][0], "fill")
-            text_content = self.canvas.itemcget(self.grid[row][col][1], "text")
+        cell = self.renderer.cell_at(event.x, event.y)
+        if cell is not None:
+            self.hovered_cell = cell
+            self.show_cell_info(*cell)
+
+    def show_cell_info(self, row, col):
+        """Shows the color, text and cost from the robot of a cell in the info label."""
+        cell = (row, col)
+        color = self.renderer.fill(row, col)
+        text_content = self.renderer.text(row, col)
+
+        # Cost from the robot under the selected policy, read from the cached cost field
+        policy, params = POLICY_CHOICES[self.policy_var.get()]
+        field = self.cost_fields.peek(self.grid_map, policy, params, self.robot_position)
+        if field is not None:
+            cost = f"{field.cost_to(cell):g}"
+        else:
+            cost = "..."  # Shown once the field computed in the background arrives
+            self.request_cost_field(policy, params)
+
+        self.info_label.config(text=f"({row}, {col}) - {color} - {text_content} - cost: {cost}")
+
+    def request_cost_field(self, policy, params):
+        """Computes the hover cost field from the robot on the field worker; never on the Tk thread."""
+        key = CostFieldCache.key(self.grid_map, policy, params, self.robot_position)
+        if key == self.pending_field:
+            return
+        self.pending_field = key
+        engine = planners.engine_for(self.grid_map, policy, *params)
+        source = self.robot_position
 
-            #self.canvas.itemconfig(self.grid[row][col][1], text=f"h: {h_cost}\n  g: {g_cost}")
+        def done(field):
+            self.pending_field = None
+            self.cost_fields.put(key, field)
+            if self.hovered_cell is not None:
+                self.show_cell_info(*self.hovered_cell)  # Fill in the cost of the cell under the pointer
 
-            self.info_label.config(text=f"({row}, {col}) - {color} - {text_content}")
+        self.field_planner.submit_task(lambda tracer: compute_field(engine, source, tracer=tracer), done)
 
     def choose_color(self):
         color = colorchooser.askcolor()[1]  # Returns a tuple (color, hex code)
@@ -191,16 +217,18 @@ class GridApp:
         self.fill_grid("white")
 
     def fill_grid(self, color):
-        for row in range(self.height):
-            for col in range(self.width):
-                self.canvas.itemconfig(self.grid[row][col], fill=color)
-                self.original_colors[row][col] = color  # Update original colors
+        self.renderer.fill_all(color)
+        self.original_colors = [[color] * self.width for _ in range(self.height)]  # Update original colors
+        self.grid_map.fill(color_to_class(color))
 
     def save_grid(self):
-        filename = filedialog.asksaveasfilename(defaultextension=".txt", filetypes=[("Text files", "*.txt")])
-        if filename:
-
-            grid_data = [[self.canvas.itemcget(self.grid[row][col][0], "fill") for col in range(self.width)] for row in range(self.height)]
+        filename = filedialog.asksaveasfilename(defaultextension=".txt", filetypes=[("Text files", "*.txt"), ("Binary maps", "*" + map_io.EXTENSION)])
+        if not filename:
+            return  # Cancelled
+        if filename.endswith(map_io.EXTENSION):
+            map_io.save_map(self.grid_map, filename)
+        else:
+            grid_data = [list(row) for row in self.renderer.fills]
             with open(filename, 'w') as f:
                 json.dump(grid_data, f)
     
@@ -208,46 +236,40 @@ class GridApp:
         """Load grid data from a file and update the grid."""
         # If no filepath is provided, ask the user for one
         if not filepath:
-            filepath = filedialog.askopenfilename(defaultextension=".txt", filetypes=[("Text files", "*.txt")])
+            filepath = filedialog.askopenfilename(defaultextension=".txt", filetypes=[("Text files", "*.txt"), ("Binary maps", "*" + map_io.EXTENSION)])
         
         if filepath and os.path.exists(filepath):
-            with open(filepath, 'r') as f:
-                grid_data = json.load(f)
-            
-            # Clear previous trajectories
-            self.trajectory_1 = []
-            self.trajectory_2 = []
-
-            for row in range(self.height):
-                for col in range(self.width):
-                    color = grid_data[row][col]
-                    
-                    # Update the color of the rectangle
-                    rect_id, text_id = self.grid[row][col]  # Retrieve the rectangle and text IDs
-                    self.canvas.itemconfig(rect_id, fill=color)  # Set the fill color for the rectangle
-                    self.original_colors[row][col] = color  # Store original colors
-
-                    # Check and store trajectory colors
-                    if color == "#ff2600":  # Hex code for red
-                        self.trajectory_1.append((row, col))
-                    elif color == "#0432ff":  # Hex code for blue
-                        self.trajectory_2.append((row, col))
-
-            try: 
-                # Reorder trajectories if applicable
-                self.trajectory_1 = self.reorder_trajectory(self.trajectory_1)
-                self.trajectory_2 = self.reorder_trajectory(self.trajectory_2)
-            except Exception as e:
-                print(f"Error reordering trajectories: {e}")
+            if filepath.endswith(map_io.EXTENSION):
+                self.grid_map.load_cells(map_io.load_map(filepath, mode="r").cells)
+            else:
+                # Stream legacy maps row by row instead of one Python string per cell
+                self.grid_map.load_cells(map_io.stream_json_map(filepath, report=self.report_loading).cells)
+                self.status_label.config(text="")
+            grid_data = self.grid_map.to_colors()
+
+            # Mirror the map onto the canvas
+            self.renderer.set_fills(grid_data)
+            self.original_colors = [list(row) for row in grid_data]  # Store original colors
+
+            # Store trajectory cells (red and blue)
+            trajectory_1 = self.grid_map.positions(RED)
+            trajectory_2 = self.grid_map.positions(BLUE)
+
+            # Order the trajectories into segments of adjacent cells
+            self.trajectory_1 = [Trajectory.from_cells(self.width, segment) for segment in self.reorder_trajectory(trajectory_1)]
+            self.trajectory_2 = [Trajectory.from_cells(self.width, segment) for segment in self.reorder_trajectory(trajectory_2)]
 
             # Place robot and destination after loading grid
             self.place_robot()
             self.place_destination()
 
+    def report_loading(self, rows, rows_per_second):
+        self.status_label.config(text=f"Loading map... {rows} rows ({rows_per_second:.0f} rows/s)")
+        self.status_label.update_idletasks()  # Loading blocks the main loop, so draw the label now
+
     def place_robot(self):
         row, col = self.robot_position
-        rect_id, _ = self.grid[row][col]  # Get the rectangle ID
-        self.canvas.itemconfig(rect_id, fill=self.robot_color)  # Configure the rectangle's color
+        self.renderer.set_fill(row, col, self.robot_color)
 
     def create_policy_dropdown(self):
         # Create a frame for dropdown
@@ -265,6 +287,9 @@ class GridApp:
 
     def on_policy_change(self, selection):
         # This function is called whenever a new option is selected in the dropdown
+        self.active_policy = POLICY_CHOICES[selection]
+        self.incremental = None
+
         if selection == "Policy 1":
             '''
             Ejecutamos policy 1 - Sortest path & most green cells possible. # Check if it will go over yellow if there is no green. 
@@ -298,209 +323,85 @@ class GridApp:
 
     def heuristic(self, a, b):
             """Calculates the Manhattan distance between two points."""
-            return abs(a[0] - b[0]) + abs(a[1] - b[1])
+            return planners.heuristic(a, b)
+
+    def show_plan(self, result):
+        """Highlights the path of a planner result on the grid."""
+        if result.found:
+            # Only the path's own cells, not a came_from dict over every reached cell
+            self.show_path(result.path)
+            print("Path found:", self.path)
+        else:
+            print("No path found!")
+
+    def plan_in_background(self, policy, params, show_costs=False):
+        """Plans on the worker thread, superseding any running search; the result is shown when it arrives."""
+        def done(result):
+            self.status_label.config(text="")
+            self.show_plan(result)
+            if show_costs:
+                # After calculating the shortest path, display the total cost (g + h) for each cell
+                self.display_final_costs(result)
+
+        def progress(expanded):
+            self.status_label.config(text=f"Planning... {expanded} nodes expanded")
+
+        self.status_label.config(text="Planning...")
+        self.planner.submit(self.grid_map, policy, params, self.robot_position, self.destination_position,
+                            done, progress)
 
     def find_shortest_path_with_neighbor_distance(self, neighbor_distance=1):
         """Finds the shortest path to the destination while maximizing visits to green cells 
         and avoiding yellow cells. Penalizes green cells near yellow cells."""
-        
-        start = self.robot_position
-        goal = self.destination_position
-
-        # Set up a priority queue (min-heap) for A* search
-        open_list = []
-        heapq.heappush(open_list, (0, start))  # (priority, (row, col))
-
-        # Dictionaries to keep track of costs, paths, and chosen neighbors
-        came_from = {start: None}
-        cost_so_far = {start: 0}
-        chosen_neighbors = {}  # Stores the best neighbor for each cell
-
-        # Define weights for each cell type and penalties for neighbors
-        weights = {
-            "green": 1,    # Prioritize green cells
-            "white": 3,    # Neutral cells
-            "#fefb00": 5   # Avoid yellow cells
-        }
-        penalty_for_yellow_neighbors = 3  # Lower than the penalty for being in a yellow cell
-
-        while open_list:
-            # Pop the node with the lowest f-score
-            _, current = heapq.heappop(open_list)
-
-            # If the robot reaches the goal, reconstruct and display the path
-            if current == goal:
-                self.reconstruct_path(came_from, start, goal)
-                break
-
-            # Get the current row and column
-            current_row, current_col = current
-
-            # Check all four possible neighbors (up, down, left, right)
-            for neighbor in self.get_neighbors(current_row, current_col):
-                neighbor_row, neighbor_col = neighbor
-
-                # Get the color of the neighbor cell
-                cell_color = self.canvas.itemcget(self.grid[neighbor_row][neighbor_col][0], "fill")
-
-                # Assign weight based on cell color
-                if cell_color == "green":
-                    move_cost = weights["green"]
-                elif cell_color == "#fefb00":
-                    move_cost = weights["#fefb00"]
-                else:
-                    move_cost = weights["white"]
-
-                # Check neighbors within the specified distance
-                penalty = 0
-                for r in range(neighbor_row - neighbor_distance, neighbor_row + neighbor_distance + 1):
-                    for c in range(neighbor_col - neighbor_distance, neighbor_col + neighbor_distance + 1):
-                        if (r, c) != (neighbor_row, neighbor_col) and self.is_within_bounds(r, c):
-                            neighbor_color = self.canvas.itemcget(self.grid[r][c][0], "fill")
-                            if neighbor_color == "#fefb00":
-                                penalty += penalty_for_yellow_neighbors
-
-                # Add penalty if any yellow neighbors are found
-                move_cost += penalty
-
-                # Calculate new cost to reach this neighbor
-                new_cost = cost_so_far[current] + move_cost
-
-                # Heuristic cost to reach the goal (for tie-breaking)
-                h_cost = self.heuristic(neighbor, goal)
-
-                # Calculate total priority (f = g + h)
-                priority = new_cost + h_cost
-
-                # If this path is shorter, or the neighbor hasn't been visited yet
-                if neighbor not in cost_so_far or new_cost < cost_so_far[neighbor]:
-                    cost_so_far[neighbor] = new_cost
-                    heapq.heappush(open_list, (priority, neighbor))
-                    came_from[neighbor] = current
-
-                    # Record the chosen neighbor for this cell
-                    chosen_neighbors[neighbor] = current
-
-            # After each step, update the grid with the latest costs and chosen paths
-            # self.update_cost_display(cost_so_far, chosen_neighbors)
-
-        # No path found
-        if current != goal:
-            print("No path found!")
-
-        # After calculating the shortest path, display the total cost (g + h) for each cell
-        self.display_final_costs(cost_so_far, chosen_neighbors)
+        self.plan_in_background("neighbor_distance", (neighbor_distance,), show_costs=True)
 
     def is_within_bounds(self, row, col):
         """Checks if the row and column are within the grid bounds."""
-        return 0 <= row < self.height and 0 <= col < self.width
+        return self.grid_map.in_bounds(row, col)
 
     def find_shortest_path(self):
         """Finds the shortest path to the destination while maximizing visits to green cells and avoiding yellow cells."""
-        start = self.robot_position
-        goal = self.destination_position
-
-        # Set up a priority queue (min-heap) for A* search
-        open_list = []
-        heapq.heappush(open_list, (0, start))  # (priority, (row, col))
-
-        # Dictionaries to keep track of costs, paths, and chosen neighbors
-        came_from = {start: None}
-        cost_so_far = {start: 0}
-        chosen_neighbors = {}  # Stores the best neighbor for each cell
-
-        # Define weights for each cell type
-        weights = {
-            "green": 1,  # Prioritize green cells
-            "white": 3,  # Neutral cells
-            "#fefb00": 5  # Avoid yellow cells
-        }
-
-        while open_list:
-            # Pop the node with the lowest f-score
-            _, current = heapq.heappop(open_list)
-
-            # If the robot reaches the goal, reconstruct and display the path
-            if current == goal:
-                self.reconstruct_path(came_from, start, goal)
-                break
-
-            # Get the current row and column
-            current_row, current_col = current
-
-            # Check all four possible neighbors (up, down, left, right)
-            for neighbor in self.get_neighbors(current_row, current_col):
-                neighbor_row, neighbor_col = neighbor
-
-                # Get the color of the neighbor cell
-                cell_color = self.canvas.itemcget(self.grid[neighbor_row][neighbor_col][0], "fill")
-                # Assign weight based on cell color
-                if cell_color == "green":
-                    move_cost = weights["green"]
-                elif cell_color == "#fefb00":
-                    move_cost = weights["#fefb00"]
-                else:
-                    move_cost = weights["white"]
-
-                # Calculate new cost to reach this neighbor
-                new_cost = cost_so_far[current] + move_cost
-
-                # Heuristic cost to reach the goal (for tie-breaking)
-                h_cost = self.heuristic(neighbor, goal)
-
-                # Calculate total priority (f = g + h)
-                priority = new_cost + h_cost
-
-                # If this path is shorter, or the neighbor hasn't been visited yet
-                if neighbor not in cost_so_far or new_cost < cost_so_far[neighbor]:
-                    cost_so_far[neighbor] = new_cost
-                    heapq.heappush(open_list, (priority, neighbor))
-                    came_from[neighbor] = current
-
-                    # Record the chosen neighbor for this cell
-                    chosen_neighbors[neighbor] = current
-
-            # After each step, update the grid with the latest costs and chosen paths
-            #self.update_cost_display(cost_so_far, chosen_neighbors)
-
-        # No path found
-        if current != goal:
-            print("No path found!")
-
-        # After calculating the shortest path, display the total cost (g + h) for each cell
-        self.display_final_costs(cost_so_far, chosen_neighbors)
+        self.plan_in_background("policy1", (), show_costs=True)
 
     def update_cost_display(self, cost_so_far, chosen_neighbors):
         for row in range(self.height):
             for col in range(self.width):
-                rect_id, text_id = self.grid[row][col]  # Extract both the rect_id and text_id
-
                 # Get the f-cost (which is the sum of cumulative cost and heuristic)
                 f_cost = cost_so_far.get((row, col), float('inf'))  # Default to infinity if the cell hasn't been visited
                 
                 # Update the text display for the cell
-                self.canvas.itemconfig(text_id, text=f"{f_cost}")  # Update the text_id to display the f-cost
+                self.renderer.set_text(row, col, f"{f_cost}")  # Display the f-cost
      
-    def display_final_costs(self, cost_so_far, chosen_neighbors):
+    def display_final_costs(self, result):
         """
         Displays the final calculated cost (g + h) for each cell in the grid.
-        This function also shows the chosen path based on the lowest cost.
+        The g-costs stay in the search's array; texts are formatted only for the cells
+        on screen (and the hovered one), so showing a plan costs the same however much
+        of the map it explored.
         """
-        for row in range(len(self.grid)):
-            for col in range(len(self.grid[row])):
-                cell_position = (row, col)
-                if cell_position in cost_so_far:
-                    g_cost = cost_so_far[cell_position]
-                    h_cost = self.heuristic(cell_position, self.destination_position)
-                    f_cost = g_cost + h_cost
-
-                    # Update the grid with the final f-cost and chosen neighbor
-                    if cell_position in chosen_neighbors:
-                        chosen_neighbor = chosen_neighbors[cell_position]
-                        #self.canvas.itemconfig(self.grid[row][col][1], text=f"{f_cost}\n h: {h_cost}\n  g: {g_cost}")
-                        self.canvas.itemconfig(self.grid[row][col][1], text=f"h: {h_cost}\n  g: {g_cost}")
-                    else:
-                        self.canvas.itemconfig(self.grid[row][col][1], text=f"{f_cost}")
+        g_costs = np.frombuffer(result.g, dtype=np.float64).reshape(self.height, self.width)  # No copy
+        self.plan_costs = (g_costs, result.start, result.goal)
+        self.renderer.set_text_source(self.cost_text)
+        self.show_heatmap()
+
+    def cost_text(self, row, col):
+        """The cost text of a cell reached by the last plan: f at the start, h and g elsewhere."""
+        g_costs, start, goal = self.plan_costs
+        g_cost = g_costs[row, col]
+        if g_cost == float('inf'):
+            return ""
+        h_cost = self.heuristic((row, col), goal)
+        if (row, col) == start:
+            return f"{g_cost + h_cost:g}"
+        #return f"{g_cost + h_cost}\n h: {h_cost}\n  g: {g_cost}"
+        return f"h: {h_cost}\n  g: {g_cost:g}"
+
+    def show_heatmap(self):
+        """Draws the last plan's g-costs as one heatmap image while View > Cost Heatmap is checked."""
+        if self.heatmap_var.get() and self.plan_costs is not None:
+            self.renderer.set_heatmap(self.plan_costs[0])
+        else:
+            self.renderer.set_heatmap(None)
 
     def display_costs(self, cost_so_far):
         """Display the total cost calculated by A* for each cell."""
@@ -532,94 +433,7 @@ class GridApp:
         - Staying as far as possible from yellow cells.
         - Maximizing the use of green cells for the shortest path.
         """
-        self.clear_previous_path()  # Clear any previous paths
-
-        start = self.robot_position
-        goal = self.destination_position
-
-        # Set up a priority queue (min-heap) for A* search
-        open_list = []
-        heapq.heappush(open_list, (0, start))  # (priority, (row, col))
-
-        # Dictionaries to keep track of costs and paths
-        came_from = {start: None}
-        cost_so_far = {start: 0}
-
-        # Define base weights for each cell type
-        weights = {
-            "green": 1,    # Green cells are the most preferred
-            "white": 2,    # Neutral cells
-            "#fefb00": 500  # Yellow cells are heavily penalized
-        }
-
-        def distance_to_nearest_yellow(row, col):
-            """Calculate the Manhattan distance to the nearest yellow cell."""
-            min_distance = float('inf')
-            found_yellow = False  # Flag to check if we found a yellow cell
-            
-            for neighbor in self.get_neighbors(row, col):
-                neighbor_row, neighbor_col = neighbor
-                cell_color = self.canvas.itemcget(self.grid[neighbor_row][neighbor_col], "fill")
-                if cell_color == "#fefb00":  # Check for yellow color
-                    found_yellow = True
-                    # Manhattan distance between (row, col) and the yellow cell
-                    distance = abs(neighbor_row - row) + abs(neighbor_col - col)
-                    min_distance = min(min_distance, distance)
-                    print(f"Found yellow at: ({neighbor_row}, {neighbor_col}) with distance: {distance}")
-
-            if not found_yellow:
-                print(f"No yellow cell found near: ({row}, {col})")
-                return 999  # Return a large value to indicate no yellow cell found
-
-            return min_distance
-
-
-        while open_list:
-            _, current = heapq.heappop(open_list)
-
-            # If the robot reaches the goal, reconstruct the path
-            if current == goal:
-                self.reconstruct_path(came_from, start, goal)  # Call the path reconstruction method
-                break  # Exit the loop once the goal is reached
-
-            # Get the current row and column
-            current_row, current_col = current
-
-            # Check all four possible neighbors (up, down, left, right)
-            for neighbor in self.get_neighbors(current_row, current_col):
-                neighbor_row, neighbor_col = neighbor
-
-                # Get the color of the neighbor cell
-                cell_color = self.canvas.itemcget(self.grid[neighbor_row][neighbor_col], "fill")
-                #print(cell_color)
-
-                # Assign base weight based on cell color
-                move_cost = weights.get(cell_color, 2)  # Default to white cell weight
-
-                # Heavily penalize cells that are close to yellow cells
-                print(str(neighbor_row) + " "+ str(neighbor_col ))
-                distance_penalty = distance_to_nearest_yellow(neighbor_row, neighbor_col)
-                print(distance_penalty)
-                if distance_penalty == 1:
-                    move_cost += 30  # Immediate proximity to yellow is highly penalized
-                elif distance_penalty == 2:
-                    move_cost += 300  # Somewhat close to yellow
-                    #print("here")
-                elif distance_penalty == 3:
-                    move_cost += 5   # Moderate proximity to yellow
-
-                # Calculate new cost to reach this neighbor
-                new_cost = cost_so_far[current] + move_cost
-
-                # If this path is shorter, or the neighbor hasn't been visited yet
-                if neighbor not in cost_so_far or new_cost < cost_so_far[neighbor]:
-                    cost_so_far[neighbor] = new_cost
-                    priority = new_cost
-                    heapq.heappush(open_list, (priority, neighbor))
-                    came_from[neighbor] = current
-
-        if current != goal:
-            print("No path found!")
+        self.plan_in_background("policy2", ())
 
     def find_shortest_path_policy3(self, yellow_cells_distance):
         """
@@ -629,81 +443,7 @@ class GridApp:
         of staying a minimum number of cells (in all directions: up, down, left, right) away from yellow cells.
         - Maximizing the use of green cells for the shortest path.
         """
-        self.clear_previous_path()  # Clear any previous paths
-
-        start = self.robot_position
-        goal = self.destination_position
-
-        # Set up a priority queue (min-heap) for A* search
-        open_list = []
-        heapq.heappush(open_list, (0, start))  # (priority, (row, col))
-
-        # Dictionaries to keep track of costs and paths
-        came_from = {start: None}
-        cost_so_far = {start: 0}
-
-        # Define base weights for each cell type
-        weights = {
-            "green": 1,    # Green cells are the most preferred
-            #"white": 2,    # Neutral cells
-            "#fefb00": 500  # Yellow cells are heavily penalized
-        }
-
-        def distance_to_nearest_yellow(row, col):
-            """Calculate the Manhattan distance to the nearest yellow cell."""
-            min_distance = float('inf')
-            
-            # Iterate through all cells in the grid to find the closest yellow cell
-            for r in range(self.height):
-                for c in range(self.width):
-                    cell_color = self.canvas.itemcget(self.grid[r][c], "fill")
-                    if cell_color == "#fefb00":  # If the cell is yellow
-                        distance = abs(r - row) + abs(c - col)  # Manhattan distance
-                        min_distance = min(min_distance, distance)
-
-            return min_distance
-
-
-        while open_list:
-            _, current = heapq.heappop(open_list)
-
-            # If the robot reaches the goal, reconstruct the path
-            if current == goal:
-                self.reconstruct_path(came_from, start, goal)  # Call the path reconstruction method
-                break  # Exit the loop once the goal is reached
-
-            # Get the current row and column
-            current_row, current_col = current
-
-            # Check all four possible neighbors (up, down, left, right)
-            for neighbor in self.get_neighbors(current_row, current_col):
-                neighbor_row, neighbor_col = neighbor
-
-                # Get the color of the neighbor cell
-                cell_color = self.canvas.itemcget(self.grid[neighbor_row][neighbor_col], "fill")
-
-                # Assign base weight based on cell color
-                move_cost = weights.get(cell_color, 2)  # Default to white cell weight
-
-                # Check the Manhattan distance to the nearest yellow cell
-                distance_penalty = distance_to_nearest_yellow(neighbor_row, neighbor_col)
-
-                # If the distance to the nearest yellow cell is less than the allowed distance, heavily penalize
-                if distance_penalty < yellow_cells_distance:
-                    move_cost += 1000  # Apply a large penalty to avoid these cells
-
-                # Calculate new cost to reach this neighbor
-                new_cost = cost_so_far[current] + move_cost
-
-                # If this path is shorter, or the neighbor hasn't been visited yet
-                if neighbor not in cost_so_far or new_cost < cost_so_far[neighbor]:
-                    cost_so_far[neighbor] = new_cost
-                    priority = new_cost
-                    heapq.heappush(open_list, (priority, neighbor))
-                    came_from[neighbor] = current
-
-        if current != goal:
-            print("No path found!")
+        self.plan_in_background("policy3", (yellow_cells_distance,))
 
     def find_shortest_path_policy4(self):
         """
@@ -712,152 +452,94 @@ class GridApp:
         - Exiting yellow cells immediately if the robot is on a yellow cell.
         - Ensuring the robot never revisits a cell it has already visited.
         """
-        self.clear_previous_path()  # Clear any previous paths
-
-        start = self.robot_position
-        goal = self.destination_position
-
-        # Set up a priority queue (min-heap) for A* search
-        open_list = []
-        heapq.heappush(open_list, (0, 0, start))  # (priority, negative_green_cells, (row, col))
-
-        # Dictionaries to keep track of costs, paths, and green cell counts
-        came_from = {start: None}
-        cost_so_far = {start: 0}
-        green_cells_count = {start: 0}
-        visited_cells = set()  # Set to track visited cells
-        visited_cells.add(start)  # Mark the start as visited
-
-        # Define base weights for each cell type
-        weights = {
-            "green": 1,    # Green cells are preferred
-            "white": 2,    # Neutral cells
-            "#fefb00": 100  # Yellow cells are penalized
-        }
-
-        def get_cell_color(row, col):
-            """Get the color of the cell at (row, col)."""
-            return self.canvas.itemcget(self.grid[row][col][0], "fill")
-
-        def is_cell_green(row, col):
-            """Check if a cell is green."""
-            return get_cell_color(row, col) == "green"
-
-        def is_cell_yellow(row, col):
-            """Check if a cell is yellow."""
-            return get_cell_color(row, col) == "#fefb00"
-
-        def heuristic(a, b):
-            """Heuristic for A* (Manhattan distance)."""
-            return abs(a[0] - b[0]) + abs(a[1] - b[1])
-
-        while open_list:
-            _, neg_green_cells, current = heapq.heappop(open_list)
-            current_green_cells = -neg_green_cells  # Convert back to positive
-
-            # If the robot reaches the goal, reconstruct the path
-            if current == goal:
-                self.reconstruct_path(came_from, start, goal)  # Call the path reconstruction method
-                break  # Exit the loop once the goal is reached
-
-            # Get the current row and column
-            current_row, current_col = current
-
-            # Check all four possible neighbors (up, down, left, right)
-            for neighbor in self.get_neighbors(current_row, current_col):
-                neighbor_row, neighbor_col = neighbor
-
-                # Skip already visited cells
-                if neighbor in visited_cells:
-                    continue
-
-                # Get the color of the neighbor cell
-                cell_color = get_cell_color(neighbor_row, neighbor_col)
-
-                # Assign base weight based on cell color
-                move_cost = weights.get(cell_color, 2)  # Default to white cell weight
-
-                # Increase the green cells count if the neighbor is green
-                additional_green_cells = 1 if cell_color == "green" else 0
-
-                # Penalize staying in yellow cells
-                if is_cell_yellow(current_row, current_col):
-                    if is_cell_yellow(neighbor_row, neighbor_col):
-                        move_cost += 100  # Heavy penalty for staying in yellow
-                    else:
-                        move_cost = 1  # Encourage leaving yellow cells immediately
-
-                # Calculate new cost to reach this neighbor
-                new_cost = cost_so_far[current] + move_cost
-                new_green_cells_count = current_green_cells + additional_green_cells
-
-                # If this path is shorter, or the neighbor hasn't been visited yet
-                if neighbor not in cost_so_far or new_cost < cost_so_far[neighbor]:
-                    cost_so_far[neighbor] = new_cost
-                    green_cells_count[neighbor] = new_green_cells_count
-                    priority = new_cost + heuristic(goal, neighbor)
-                    heapq.heappush(open_list, (priority, -new_green_cells_count, neighbor))
-                    came_from[neighbor] = current
-                    visited_cells.add(neighbor)  # Mark this neighbor as visited
-
-        if current != goal:
-            print("No path found!")
+        self.plan_in_background("policy4", ())
 
     def place_destination(self):
         row, col = self.destination_position
-        rect_id, _ = self.grid[row][col]  # Extract the rectangle ID
-        self.canvas.itemconfig(rect_id, fill=self.destination_color)  # Configure the rectangle's color
+        self.renderer.set_fill(row, col, self.destination_color)
     
     def get_neighbors(self, row, col):
         """Returns the valid neighboring cells (up, down, left, right)."""
-        neighbors = []
-        for d_row, d_col in [(-1, 0), (1, 0), (0, -1), (0, 1)]:  # up, down, left, right
-            neighbor_row, neighbor_col = row + d_row, col + d_col
-            if 0 <= neighbor_row < self.height and 0 <= neighbor_col < self.width:
-                neighbors.append((neighbor_row, neighbor_col))
-                print(f"Cell ({neighbor_row}, {neighbor_col}) color: {self.canvas.itemcget(self.grid[neighbor_row][neighbor_col], 'fill')}")
-        return neighbors
-
-    def reconstruct_path(self, came_from, start, goal, clear_previous=True):
-        """Reconstructs the path from start to goal."""
-        current = goal
-
-        # Clear the previous path display if needed
-        if clear_previous:
-            self.clear_previous_path()
-
-        while current != start:
-            self.path.append(current)
-            current = came_from[current]
-
-        self.path.reverse()  # Reverse the path to get it from start to goal
-
-        # Highlight the new path on the grid
+        return self.grid_map.neighbors(row, col)
+
+    def replan(self):
+        """Repairs the plan of the active policy after the map changed and redraws the path."""
+        if self.active_policy is None:
+            return
+        if self.planner.busy():
+            # The search in flight read the old map: start it over on the new one
+            self.on_policy_change(self.policy_var.get())
+            return
+        policy, params = self.active_policy
+        if not supports(planners.engine_for(self.grid_map, policy, *params)):
+            # D* Lite would drop the policy's tie-break and relax-once rules: search in full
+            self.plan_in_background(policy, params, show_costs=self.plan_costs is not None)
+            return
+
+        # Pick up the edits here; the worker then only runs the search
+        planner = self.incremental
+        if planner is None or planner.goal != planner.graph.node(*self.destination_position):
+            planner = DStarLite(self.grid_map, policy, params, self.robot_position, self.destination_position)
+        else:
+            planner.move_start(self.robot_position)
+            planner.update_map()
+        # The worker owns the planner until it is done; a cancelled repair leaves it half-updated
+        self.incremental = None
+
+        def repair(tracer):
+            planner.tracer = tracer
+            return planner.search()
+
+        def done(result):
+            _, path = result
+            self.status_label.config(text="")
+            planner.move_start(self.robot_position)
+            self.incremental = planner
+            # The cost overlay holds the old plan's g-costs from the start, while D* Lite
+            # keeps costs to the goal: drop it rather than show stale numbers
+            if self.plan_costs is not None:
+                self.clear_grid_text()
+            if not path:
+                print("No path found!")
+            self.show_path(path)
+
+        def progress(expanded):
+            self.status_label.config(text=f"Replanning... {expanded} nodes expanded")
+
+        self.status_label.config(text="Replanning...")
+        self.planner.submit_task(repair, done, progress)
+
+    def show_path(self, path):
+        """Replaces the highlighted path, restoring the cells of the previous one."""
         for row, col in self.path[0:-1]:
-            rect_id, _ = self.grid[row][col]  # Extract the rectangle ID
-            self.canvas.itemconfig(rect_id, fill="orange")  # Configure the rectangle's color
-
+            if (row, col) != self.robot_position:
+                self.renderer.set_fill(row, col, self.original_colors[row][col])
 
-        print("Path found:", self.path)
+        playing = self.trajectory_index < len(self.current_trajectory)
+        self.path = Trajectory.from_cells(self.width, path)
+        for row, col in self.path[0:-1]:
+            self.renderer.set_fill(row, col, "orange")
 
-    def clear_previous_path(self):
-        """Clears the previously displayed paths on the grid."""
-        #for row, col in self.path:
-        #    self.canvas.itemconfig(self.grid[row][col], fill="white")  # Reset color to white or neutral
-        self.path.clear()  # Clear the stored path list
+        # Keep following the repaired path if the robot is playing the old one
+        if playing:
+            self.current_trajectory = self.path
+            self.trajectory_index = 0
 
     def move_robot(self, position):
         if 0 <= position[0] < self.height and 0 <= position[1] < self.width:
             # Check if the destination cell is not black
-            if self.canvas.itemcget(self.grid[position[0]][position[1]][0], "fill") != "black":  # Access the rectangle ID with [0]
+            if self.grid_map.get(position[0], position[1]) != BLACK:
                 # Restore the original color of the previous cell
                 original_color = self.original_colors[self.robot_position[0]][self.robot_position[1]]
-                self.canvas.itemconfig(self.grid[self.robot_position[0]][self.robot_position[1]][0], fill=original_color)  # Access the rectangle ID with [0]
+                self.renderer.set_fill(self.robot_position[0], self.robot_position[1], original_color)
                 
                 # Update the robot's position and place it
                 self.robot_position = position
                 self.place_robot()
-                self.get_neighbors(self.robot_position[0], self.robot_position[1])
+
+                # Advancing the start only shifts the incremental planner's keys
+                if self.incremental is not None:
+                    self.incremental.move_start(position)
 
     def create_controls(self):
         control_frame = tk.Frame(self.root)
@@ -889,6 +571,9 @@ class GridApp:
         count_clusters_button = tk.Button(control_frame, text="Count Clusters", command=self.count_clusters)
         count_clusters_button.grid(row=6, column=1)
 
+        plan_tour_button = tk.Button(control_frame, text="Plan Tour", command=self.plan_tour)
+        plan_tour_button.grid(row=6, column=2)
+
         # Add new buttons and entry fields
         self.amplify_button = tk.Button(control_frame, text="Amplify", command=self.amplify_trajectory)
         self.amplify_button.grid(row=7, column=0)
@@ -945,10 +630,9 @@ class GridApp:
         """
         Clears the text in all cells of the grid.
         """
-        for row in range(len(self.grid)):
-            for col in range(len(self.grid[row])):
-                # Clear the text in the text part of each cell (assuming it's at index 1)
-                self.canvas.itemconfig(self.grid[row][col][1], text="")
+        self.renderer.clear_texts()
+        self.plan_costs = None
+        self.show_heatmap()
 
     def display_delete(self):
         for text_id in self.text_ids:
@@ -969,77 +653,74 @@ class GridApp:
 
     def print_trajectory_1(self):
         print("Trajectory 1 (Red):")
-        for position in self.trajectory_1:
-            print(position)
+        for index, segment in enumerate(self.trajectory_1):
+            print(f"Segment {index}:")
+            for position in segment:
+                print(position)
 
     def print_trajectory_2(self):
         print("Trajectory 2 (Blue):")
-        for position in self.trajectory_2:
-            print(position)
+        for index, segment in enumerate(self.trajectory_2):
+            print(f"Segment {index}:")
+            for position in segment:
+                print(position)
 
     def count_clusters(self):
-        visited = [[False for _ in range(self.width)] for _ in range(self.height)]
-        clusters = 0
-        cluster_data = {}
-
-        def dfs_black(row, col, cluster_id):
-            stack = [(row, col)]
-            black_cells = []
-            while stack:
-                r, c = stack.pop()
-                if not (0 <= r < self.height and 0 <= c < self.width) or visited[r][c]:
-                    continue
-                if self.canvas.itemcget(self.grid[r][c], "fill") != "#000000":
-                    continue
-                visited[r][c] = True
-                black_cells.append((r, c))
-
-                # Check all 4 directions
-                for dr, dc in [(-1, 0), (1, 0), (0, -1), (0, 1)]:
-                    nr, nc = r + dr, c + dc
-                    stack.append((nr, nc))
-            return black_cells
-
-        def bfs_yellow(black_cells):
-            yellow_cells = set()
-            directions = [(-1, 0), (1, 0), (0, -1), (0, 1)]
-            for r, c in black_cells:
-                for dr, dc in directions:
-                    nr, nc = r + dr, c + dc
-                    if 0 <= nr < self.height and 0 <= nc < self.width and not visited[nr][nc]:
-                        if self.canvas.itemcget(self.grid[nr][nc], "fill") == "#fefb00":
-                            yellow_cells.add((nr, nc))
-                            visited[nr][nc] = True
-            return yellow_cells
-
-        for row in range(self.height):
-            for col in range(self.width):
-                if not visited[row][col] and self.canvas.itemcget(self.grid[row][col], "fill") == "#000000":
-                    black_cells = dfs_black(row, col, clusters)
-                    if black_cells:
-                        yellow_cells = bfs_yellow(black_cells)
-                        if yellow_cells:
-                            cluster_data[clusters] = {
-                                'black': black_cells,
-                                'yellow': list(yellow_cells)
-                            }
-                            clusters += 1
-
-        # Print the cluster IDs and their cell contents
-        for cluster_id, cells in cluster_data.items():
+        # Labels are repaired locally after paint edits instead of rescanning the whole grid
+        if self.clusters is None:
+            self.clusters = Clusters(self.grid_map)
+        clusters = self.clusters
+        for cluster_id in range(len(clusters)):
             print(f"Cluster ID: {cluster_id}")
-            print(f"  Black cells: {cells['black']}")
-            print(f"  Yellow cells: {cells['yellow']}")
+            print(f"  Black cells: {[divmod(node, self.width) for node in clusters.black_cells(cluster_id).tolist()]}")
+            print(f"  Yellow cells: {[divmod(node, self.width) for node in clusters.yellow_cells(cluster_id).tolist()]}")
+
+        print(f"Number of clusters: {len(clusters)}")
 
-        print(f"Number of clusters: {clusters}")
+    def plan_tour(self):
+        """
+        Plans one tour under the selected policy from the robot through waypoints sampled
+        along both painted trajectories to the destination, in the background.
+        """
+        waypoints = sample_waypoints(self.trajectory_1 + self.trajectory_2, TOUR_SPACING)
+        if not waypoints:
+            print("No trajectory waypoints to visit!")
+            return
+        policy, params = POLICY_CHOICES[self.policy_var.get()]
+        engine = planners.engine_for(self.grid_map, policy, *params)
+        start, end = self.robot_position, self.destination_position
+
+        def done(tour):
+            self.status_label.config(text="")
+            # The tour is not repaired on edits like a single plan
+            self.active_policy = None
+            self.incremental = None
+            self.show_path(tour.path)
+            print(f"Tour of {len(tour.order)} stops, cost {tour.cost:g}:", tour.stops)
+            if tour.skipped:
+                print("Unreachable waypoints skipped:", tour.skipped)
+
+        def progress(expanded):
+            self.status_label.config(text=f"Planning tour of {len(waypoints)} waypoints... {expanded} nodes expanded")
+
+        self.status_label.config(text="Planning tour...")
+        self.planner.submit_task(lambda tracer: plan_tour(engine, start, waypoints, end, tracer=tracer), done, progress)
+
+    def close(self):
+        self.planner.shutdown()  # Stop a running search so the process can exit
+        self.field_planner.shutdown()
+        self.root.destroy()
 
     # Function to clear the path
     def clear_path(self):
         
-        # Reload map
-        self.load_grid(self.default_map)
-        
-        self.path.clear() 
+        # Restore the path cells instead of reloading the whole map
+        self.planner.cancel()
+        self.status_label.config(text="")
+        self.show_path([])
+        self.active_policy = None
+        self.incremental = None
+
         self.clear_grid_text()
 
 
@@ -0,0 +1,203 @@
+"""Binary map format: a small header followed by the raw uint8 cell-class raster.
+
+Layout (little endian):
+    magic        4s   b"GMAP"
+    version      H    FORMAT_VERSION
+    palette      H    number of palette entries
+    width        I
+    height       I
+    data_offset  Q    byte offset of the raster (64-byte aligned)
+    palette entries: class (B), color length (B), color (ASCII)
+    raster: height * width uint8 cell classes, row-major
+
+The raster is loaded with numpy.memmap, so opening a map costs the same for any size
+and every process that opens the same file shares one copy in the OS page cache.
+"""
+import json
+import os
+import struct
+import sys
+import time
+
+import numpy as np
+
+from grid_map import CLASS_COLORS, OTHER, PALETTE, GridMap, color_to_class
+
+MAGIC = b"GMAP"
+FORMAT_VERSION = 1
+EXTENSION = ".gmap"
+HEADER = struct.Struct("<4sHHIIQ")
+ALIGNMENT = 64
+
+
+def save_map(grid_map, path, palette=CLASS_COLORS):
+    """Writes a GridMap in the binary format."""
+    entries = b"".join(struct.pack("<BB", cell_class, len(color)) + color.encode("ascii")
+                       for cell_class, color in palette.items())
+    data_offset = -(-(HEADER.size + len(entries)) // ALIGNMENT) * ALIGNMENT  # Round up to the alignment
+    with open(path, "wb") as f:
+        f.write(HEADER.pack(MAGIC, FORMAT_VERSION, len(palette), grid_map.width, grid_map.height, data_offset))
+        f.write(entries)
+        f.write(b"\0" * (data_offset - HEADER.size - len(entries)))
+        f.write(np.ascontiguousarray(grid_map.cells, dtype=np.uint8).tobytes())
+
+
+def read_header(path):
+    """Returns (width, height, palette, data_offset) of a binary map."""
+    with open(path, "rb") as f:
+        magic, version, palette_size, width, height, data_offset = HEADER.unpack(f.read(HEADER.size))
+        if magic != MAGIC:
+            raise ValueError(f"{path} is not a binary grid map")
+        if version != FORMAT_VERSION:
+            raise ValueError(f"Unsupported binary map version {version} in {path}")
+        palette = {}
+        for _ in range(palette_size):
+            cell_class, length = struct.unpack("<BB", f.read(2))
+            palette[cell_class] = f.read(length).decode("ascii")
+    return width, height, palette, data_offset
+
+
+def class_table(palette):
+    """
+    Lookup table from the class codes stored under a header palette to this build's
+    classes, matched by color, or None if every stored code already means the same.
+    Raises ValueError for a color without a class here.
+    """
+    if all(CLASS_COLORS.get(cell_class) == color for cell_class, color in palette.items()):
+        return None
+    table = np.arange(256, dtype=np.uint8)
+    for cell_class, color in palette.items():
+        if CLASS_COLORS.get(cell_class) == color:
+            continue
+        if color not in PALETTE:
+            raise ValueError(f"Class {cell_class} has the unknown color {color!r}")
+        table[cell_class] = color_to_class(color)
+    return table
+
+
+def load_map(path, mode="c"):
+    """
+    Opens a binary map as a GridMap backed by numpy.memmap (no copy). The default
+    copy-on-write mode lets the planners paint cells without touching the file;
+    use mode="r" for a strictly read-only map or "r+" to edit the file in place.
+    A file whose palette numbers the classes differently is remapped into memory,
+    which "r+" cannot do.
+    """
+    width, height, palette, data_offset = read_header(path)
+    cells = np.memmap(path, dtype=np.uint8, mode=mode, offset=data_offset, shape=(height, width))
+    table = class_table(palette)
+    if table is not None:
+        if mode == "r+":
+            raise ValueError(f"{path} uses another class palette and cannot be edited in place")
+        cells = table[cells]
+    return GridMap.from_cells(cells)
+
+
+def iter_json_rows(f, chunk_size=1 << 20):
+    """
+    Yields the rows of a JSON list-of-lists one at a time, reading the file in chunks,
+    so only the current row is ever held as Python objects.
+    """
+    decoder = json.JSONDecoder()
+    buffer = ""
+    pos = 0
+    eof = False
+    started = False
+
+    while True:
+        # Skip whitespace and the commas between rows, reading more when the buffer runs out
+        while True:
+            while pos < len(buffer) and buffer[pos] in " \t\r\n,":
+                pos += 1
+            if pos < len(buffer) or eof:
+                break
+            buffer = f.read(chunk_size)
+            pos = 0
+            eof = not buffer
+        if pos >= len(buffer):
+            raise ValueError("Unexpected end of JSON map")
+
+        char = buffer[pos]
+        if not started:
+            if char != "[":
+                raise ValueError("A JSON map must be a list of rows")
+            started = True
+            pos += 1
+            continue
+        if char == "]":
+            return
+        if char != "[":
+            raise ValueError(f"Unexpected character {char!r} in JSON map")
+
+        # Decode the next row, extending the buffer (in growing reads) until it holds all of it
+        read_size = chunk_size
+        while True:
+            try:
+                row, pos = decoder.raw_decode(buffer, pos)
+                break
+            except json.JSONDecodeError:
+                more = "" if eof else f.read(read_size)
+                if not more:
+                    raise ValueError("Invalid or truncated row in JSON map")
+                buffer = buffer[pos:] + more
+                pos = 0
+                read_size *= 2
+        yield row
+
+        # Drop the consumed part of the buffer now and then
+        if pos > chunk_size:
+            buffer = buffer[pos:]
+            pos = 0
+
+
+def stream_json_map(path, chunk_size=1 << 20, report=None, report_every=1000):
+    """
+    Loads a save_grid JSON map row by row straight into a uint8 class raster. Peak
+    memory stays close to the raster size instead of one Python string per cell.
+    report(rows, rows_per_second) is called every report_every rows and once at the end.
+    """
+    lookup = dict(PALETTE)
+    cells = None
+    width = 0
+    rows = 0
+    started = time.perf_counter()
+
+    with open(path, "r") as f:
+        for row in iter_json_rows(f, chunk_size):
+            if cells is None:
+                width = len(row)
+                # Guess the height from the file size, grow if the guess is short
+                estimate = max(1, os.path.getsize(path) // max(1, len(json.dumps(row)) + 2) + 1)
+                cells = np.empty((estimate, width), dtype=np.uint8)
+            elif len(row) != width:
+                raise ValueError(f"Row {rows} has {len(row)} cells, expected {width}")
+            if rows == len(cells):
+                cells.resize((2 * len(cells), width), refcheck=False)
+            cells[rows] = np.fromiter((lookup.get(color, OTHER) for color in row), dtype=np.uint8, count=width)
+            rows += 1
+            if report is not None and rows % report_every == 0:
+                report(rows, rows / max(time.perf_counter() - started, 1e-9))
+
+    if cells is None:
+        raise ValueError(f"{path} holds an empty map")
+    cells.resize((rows, width), refcheck=False)  # Trim the unused estimate in place
+    if report is not None:
+        report(rows, rows / max(time.perf_counter() - started, 1e-9))
+    return GridMap.from_cells(cells)
+
+
+def convert_json_map(source, destination=None, report=None):
+    """Converts a save_grid JSON map (list-of-lists of colors) to the binary format."""
+    if destination is None:
+        destination = os.path.splitext(source)[0] + EXTENSION
+    save_map(stream_json_map(source, report=report), destination)
+    return destination
+
+
+if __name__ == "__main__":
+    # Usage: python map_io.py maps/*.txt
+    for source in sys.argv[1:]:
+        rates = []
+        destination = convert_json_map(source, report=lambda rows, rate: rates.append((rows, rate)))
+        rows, rate = rates[-1]
+        print(f"{source} -> {destination} ({rows} rows, {rate:.0f} rows/s)")
@@ -0,0 +1,100 @@
+"""Process-pool backend for batch planning. The compiled engine arrays live in shared memory."""
+import os
+from multiprocessing import Pool, shared_memory
+
+import numpy as np
+
+from astar import AStar
+from batch import BatchResult, as_node_pairs, plan_many, run_queries
+from jump_search import JumpAStar
+from planners import engine_for
+
+# State of each worker process, set once by init_worker
+_worker = {}
+
+
+def share_array(array):
+    """Copies an array into a new shared memory block. Returns (block, descriptor)."""
+    block = shared_memory.SharedMemory(create=True, size=max(array.nbytes, 1))
+    np.ndarray(array.shape, dtype=array.dtype, buffer=block.buf)[...] = array
+    return block, (block.name, array.shape, array.dtype.str)
+
+
+def attach_array(descriptor):
+    """Maps a shared array into this process without copying. Returns (block, array)."""
+    name, shape, dtype = descriptor
+    # Workers share the parent's resource tracker, which unlinks the block when the parent does
+    block = shared_memory.SharedMemory(name=name)
+    return block, np.ndarray(shape, dtype=np.dtype(dtype), buffer=block.buf)
+
+
+def init_worker(descriptors, options):
+    """Attaches the shared engine arrays and query pairs and builds this worker's engine."""
+    arrays = {}
+    blocks = []
+    for name, descriptor in descriptors.items():
+        if descriptor is None:
+            arrays[name] = None
+            continue
+        block, arrays[name] = attach_array(descriptor)
+        blocks.append(block)
+    _worker["blocks"] = blocks  # Keep the mappings alive for the life of the worker
+    _worker["pairs"] = arrays.pop("pairs")
+    engine_class = JumpAStar if options.get("jumps") else AStar
+    _worker["engine"] = engine_class.from_export(arrays, options)
+
+
+def run_chunk(chunk):
+    """Runs the queries pairs[begin:end]. Only the two bounds are pickled per task."""
+    index, begin, end = chunk
+    results = run_queries(_worker["engine"], _worker["pairs"][begin:end])
+    costs = np.array([cost for cost, _ in results], dtype=np.float64)
+    lengths = np.array([len(nodes) for _, nodes in results], dtype=np.int64)
+    nodes = np.fromiter((node for _, path in results for node in path), dtype=np.int32, count=int(lengths.sum()))
+    return index, costs, lengths, nodes
+
+
+def plan_many_parallel(grid_map, policy, pairs, *params, processes=None, chunk_size=64):
+    """
+    Same as batch.plan_many but spread over a process pool. The engine is compiled once
+    in this process; its arrays and the query pairs are handed to the workers through
+    multiprocessing.shared_memory. Chunks of chunk_size queries go through the pool's
+    shared task queue, so a worker that finishes early simply takes the next chunk.
+    Results are returned in the order of pairs regardless of which worker ran them.
+    """
+    processes = processes or os.cpu_count() or 1
+    if processes == 1:
+        return plan_many(grid_map, policy, pairs, *params)
+
+    engine = engine_for(grid_map, policy, *params)
+    arrays, options = engine.export()
+    node_pairs = as_node_pairs(grid_map, pairs)
+
+    blocks = []
+    descriptors = {}
+    try:
+        for name, array in list(arrays.items()) + [("pairs", node_pairs)]:
+            if array is None:
+                descriptors[name] = None
+                continue
+            block, descriptors[name] = share_array(np.ascontiguousarray(array))
+            blocks.append(block)
+
+        chunks = [(index, begin, min(begin + chunk_size, len(node_pairs)))
+                  for index, begin in enumerate(range(0, len(node_pairs), chunk_size))]
+        parts = [None] * len(chunks)
+        with Pool(processes, initializer=init_worker, initargs=(descriptors, options)) as pool:
+            for index, costs, lengths, nodes in pool.imap_unordered(run_chunk, chunks):
+                parts[index] = (costs, lengths, nodes)
+    finally:
+        for block in blocks:
+            block.close()
+            block.unlink()
+
+    # Reassemble the chunks in query order
+    costs = np.concatenate([part[0] for part in parts]) if parts else np.zeros(0)
+    lengths = np.concatenate([part[1] for part in parts]) if parts else np.zeros(0, dtype=np.int64)
+    nodes = np.concatenate([part[2] for part in parts]) if parts else np.zeros(0, dtype=np.int32)
+    offsets = np.zeros(len(costs) + 1, dtype=np.int64)
+    np.cumsum(lengths, out=offsets[1:])
+    return BatchResult(grid_map.width, costs, offsets, nodes)
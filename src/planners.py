@@ -0,0 +1,186 @@
+"""Headless path planners. Every policy reads cell classes from a GridMap raster."""
+import numpy as np
+
+import cost_map
+from astar import AStar, GridGraph, ManhattanHeuristic
+from grid_map import GREEN, YELLOW
+from jump_search import JumpAStar
+from tracing import NULL_TRACER
+
+
+def heuristic(a, b):
+    """Calculates the Manhattan distance between two points."""
+    return abs(a[0] - b[0]) + abs(a[1] - b[1])
+
+
+def policy1_cost_map(grid_map):
+    """Step costs for Policy 1: green 1, white 3, yellow 5."""
+    weights = {
+        GREEN: 1,  # Prioritize green cells
+        YELLOW: 5  # Avoid yellow cells
+    }
+    return cost_map.class_cost(grid_map.cells, weights, 3)  # Neutral cells cost 3
+
+
+def neighbor_distance_cost_map(grid_map, neighbor_distance):
+    """Policy 1 step costs plus 3 for every yellow cell within neighbor_distance."""
+    penalty_for_yellow_neighbors = 3  # Lower than the penalty for being in a yellow cell
+    return policy1_cost_map(grid_map) + cost_map.yellow_neighbor_penalty(
+        grid_map.cells, neighbor_distance, penalty_for_yellow_neighbors)
+
+
+def policy2_cost_map(grid_map):
+    """Step costs for Policy 2: green 1, white 2, yellow 500, plus yellow proximity penalties."""
+    weights = {
+        GREEN: 1,    # Green cells are the most preferred
+        YELLOW: 500  # Yellow cells are heavily penalized
+    }
+    proximity_penalties = {
+        1: 30,   # Immediate proximity to yellow is highly penalized
+        2: 300,  # Somewhat close to yellow
+        3: 5     # Moderate proximity to yellow
+    }
+    return cost_map.class_cost(grid_map.cells, weights, 2) + cost_map.proximity_penalty(
+        grid_map.distance_field(YELLOW), proximity_penalties)
+
+
+def policy3_cost_map(grid_map, yellow_cells_distance):
+    """Step costs for Policy 3: green 1, white 2, yellow 500, plus 1000 closer than yellow_cells_distance."""
+    weights = {
+        GREEN: 1,    # Green cells are the most preferred
+        YELLOW: 500  # Yellow cells are heavily penalized
+    }
+    return cost_map.class_cost(grid_map.cells, weights, 2) + cost_map.within_distance_penalty(
+        grid_map.distance_field(YELLOW), yellow_cells_distance, 1000)
+
+
+def policy4_cost_maps(grid_map):
+    """
+    Step costs for Policy 4 as two layers: stepping out of a non-yellow cell
+    (green 1, white 2, yellow 100) and stepping out of a yellow cell
+    (yellow 200 to punish staying, anything else 1 to leave immediately).
+    """
+    weights = {
+        GREEN: 1,    # Green cells are preferred
+        YELLOW: 100  # Yellow cells are penalized
+    }
+    from_yellow_weights = {
+        YELLOW: 100 + 100  # Heavy penalty for staying in yellow
+    }
+    return (cost_map.class_cost(grid_map.cells, weights, 2),
+            cost_map.class_cost(grid_map.cells, from_yellow_weights, 1))
+
+
+def policy1_engine(grid_map):
+    """A* over the Policy 1 cost map."""
+    graph = GridGraph(grid_map.width, grid_map.height)
+    return AStar(graph, policy1_cost_map(grid_map), heuristic=ManhattanHeuristic(graph))
+
+
+def policy1_jumps_engine(grid_map):
+    """Policy 1 jumping across uniform-cost rectangles: the same costs, but equally cheap paths may differ."""
+    graph = GridGraph(grid_map.width, grid_map.height)
+    return JumpAStar(graph, policy1_cost_map(grid_map), heuristic=ManhattanHeuristic(graph))
+
+
+def neighbor_distance_engine(grid_map, neighbor_distance):
+    """A* over the neighbor-distance cost map."""
+    graph = GridGraph(grid_map.width, grid_map.height)
+    return AStar(graph, neighbor_distance_cost_map(grid_map, neighbor_distance), heuristic=ManhattanHeuristic(graph))
+
+
+def policy2_engine(grid_map):
+    """Dijkstra over the Policy 2 cost map."""
+    return AStar(GridGraph(grid_map.width, grid_map.height), policy2_cost_map(grid_map))
+
+
+def policy3_engine(grid_map, yellow_cells_distance):
+    """Dijkstra over the Policy 3 cost map."""
+    return AStar(GridGraph(grid_map.width, grid_map.height), policy3_cost_map(grid_map, yellow_cells_distance))
+
+
+def policy4_engine(grid_map):
+    """A* over the two Policy 4 layers, preferring more green cells on ties and never relaxing a cell twice."""
+    graph = GridGraph(grid_map.width, grid_map.height)
+    step_cost, from_yellow_cost = policy4_cost_maps(grid_map)
+    return AStar(graph, np.stack([step_cost, from_yellow_cost]),
+                 heuristic=ManhattanHeuristic(graph),
+                 tie_break=(grid_map.cells == GREEN).astype(np.uint8),
+                 cost_layer=(grid_map.cells == YELLOW).astype(np.uint8),
+                 relax_once=True)
+
+
+# Policy name -> engine builder taking (grid_map, *policy parameters)
+POLICY_ENGINES = {
+    "policy1": policy1_engine,
+    "policy1_jumps": policy1_jumps_engine,  # Opt-in: fewer expansions, other tie-breaking
+    "neighbor_distance": neighbor_distance_engine,
+    "policy2": policy2_engine,
+    "policy3": policy3_engine,
+    "policy4": policy4_engine,
+}
+
+
+def engine_for(grid_map, policy, *params):
+    """Returns the compiled engine for a policy, cached on the map until its next edit."""
+    if policy not in POLICY_ENGINES:
+        raise ValueError(f"Unknown policy: {policy}")
+    return grid_map.derived((policy,) + params, lambda m: POLICY_ENGINES[policy](m, *params))
+
+
+def search(grid_map, policy, params, start, goal, tracer, bidirectional=False):
+    """
+    Compiles (or reuses) a policy's engine and runs it between two (row, col) cells,
+    optionally as a bidirectional search (single-layer policies only).
+    """
+    with tracer.phase("compile"):
+        engine = engine_for(grid_map, policy, *params)
+    graph = engine.graph
+    run = engine.search_bidirectional if bidirectional else engine.search
+    return run(graph.node(*start), graph.node(*goal), tracer)
+
+
+def find_shortest_path(grid_map, start, goal, tracer=NULL_TRACER, bidirectional=False):
+    """
+    Finds the shortest path to the destination while maximizing visits to green cells and avoiding yellow cells.
+    bidirectional=True meets in the middle, which expands fewer cells on long queries.
+    """
+    return search(grid_map, "policy1", (), start, goal, tracer, bidirectional)
+
+
+def find_shortest_path_with_neighbor_distance(grid_map, start, goal, neighbor_distance=1, tracer=NULL_TRACER,
+                                              bidirectional=False):
+    """Finds the shortest path to the destination while maximizing visits to green cells
+    and avoiding yellow cells. Penalizes green cells near yellow cells.
+    bidirectional=True meets in the middle, which expands fewer cells on long queries."""
+    return search(grid_map, "neighbor_distance", (neighbor_distance,), start, goal, tracer, bidirectional)
+
+
+def find_shortest_path_policy2(grid_map, start, goal, tracer=NULL_TRACER):
+    """
+    Finds the shortest path to the destination while:
+    - Staying as far as possible from yellow cells.
+    - Maximizing the use of green cells for the shortest path.
+    """
+    return search(grid_map, "policy2", (), start, goal, tracer)
+
+
+def find_shortest_path_policy3(grid_map, start, goal, yellow_cells_distance, tracer=NULL_TRACER):
+    """
+    Finds the shortest path to the destination while:
+    - Staying away from yellow cells based on an input parameter yellow_cells_distance.
+    This needs to be an integer. The robot should generate a path that always follows the rule
+    of staying a minimum number of cells (in all directions: up, down, left, right) away from yellow cells.
+    - Maximizing the use of green cells for the shortest path.
+    """
+    return search(grid_map, "policy3", (yellow_cells_distance,), start, goal, tracer)
+
+
+def find_shortest_path_policy4(grid_map, start, goal, tracer=NULL_TRACER):
+    """
+    Finds the shortest path to the destination while:
+    - Maximizing the use of green cells in the shortest path.
+    - Exiting yellow cells immediately if the robot is on a yellow cell.
+    - Ensuring the robot never revisits a cell it has already visited.
+    """
+    return search(grid_map, "policy4", (), start, goal, tracer)
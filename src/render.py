@@ -0,0 +1,371 @@
+"""Viewport rendering of the grid: only the visible cells are drawn, and changes are batched once per frame."""
+import math
+import tkinter as tk
+
+import numpy as np
+
+FRAME_MS = 16  # At most one redraw per ~60 Hz frame
+ITEM_ZOOM = 16  # Pixels per cell from which cells are canvas items with texts; below, one image
+MAX_ZOOM = 100
+BACKGROUND = (160, 160, 160)  # Image pixels outside the map
+TEXT_FONT = ("Arial", 12)
+ZOOM_STEP = 1.25  # Per mouse wheel notch
+LEVEL_REPAIRS = 4096  # Above this many edited cells the mipmaps are rebuilt instead of patched
+HEAT_LOW = np.array([40, 40, 255], dtype=np.float64)  # Heatmap color of the lowest value
+HEAT_HIGH = np.array([255, 40, 40], dtype=np.float64)  # Heatmap color of the highest value
+
+# Tcl helpers run once per frame: the whole batch crosses from Python to Tcl as a single list
+CONFIGURE_ITEMS = "{canvas option pairs} {foreach {item value} $pairs {$canvas itemconfigure $item $option $value}}"
+PLACE_CELLS = ("{canvas cells} {foreach {rect text x1 y1 x2 y2 fill label} $cells {"
+               "$canvas coords $rect $x1 $y1 $x2 $y2; "
+               "$canvas coords $text [expr {($x1 + $x2) / 2.0}] [expr {($y1 + $y2) / 2.0}]; "
+               "$canvas itemconfigure $rect -fill $fill -state normal; "
+               "$canvas itemconfigure $text -text $label -state normal}}")
+HIDE_ITEMS = "{canvas items} {foreach item $items {$canvas itemconfigure $item -state hidden}}"
+
+
+def mipmaps(rgb):
+    """Overview levels of an (height, width, 3) uint8 raster: level k averages blocks of 2^k x 2^k cells."""
+    levels = [rgb]
+    while max(levels[-1].shape[:2]) > 1:
+        level = levels[-1].astype(np.uint16)
+        # Odd sizes repeat their last row or column
+        if level.shape[0] % 2:
+            level = np.concatenate([level, level[-1:]], axis=0)
+        if level.shape[1] % 2:
+            level = np.concatenate([level, level[:, -1:]], axis=1)
+        level = (level[0::2, 0::2] + level[1::2, 0::2] + level[0::2, 1::2] + level[1::2, 1::2] + 2) // 4
+        levels.append(level.astype(np.uint8))
+    return levels
+
+
+class GridRenderer:
+    """
+    Draws a width x height grid of cells through a view_width x view_height pixel
+    viewport that can be scrolled (xview / yview, the Tk scrollbar protocol) and zoomed
+    (zoom_at). Callers change the model with set_fill / set_text (and the bulk
+    fill_all, set_fills, clear_texts); changes are drawn in one batched pass on the
+    next frame, or right away with flush().
+
+    Nothing is created per map cell on the canvas:
+    - from ITEM_ZOOM pixels per cell up, a pool of rectangle and text items sized to the
+      view is reassigned to the visible cells;
+    - below that (or always with raster=True), the view is one PhotoImage rendered from
+      the cell colors, from a mipmap level of them when a pixel covers several cells.
+
+    Texts can also come from a text source, text_source(row, col) -> str, asked only for
+    the cells on screen, and a heatmap of per-cell values can replace the cell colors
+    in the image.
+    """
+
+    def __init__(self, canvas, width, height, view_width, view_height, zoom, fill="white", raster=False):
+        self.canvas = canvas
+        self.width = width
+        self.height = height
+        self.view_width = view_width
+        self.view_height = view_height
+        self.raster = raster
+        self.zoom = float(zoom)  # Pixels per cell
+        self.x0 = 0.0  # Map column at the left edge of the view
+        self.y0 = 0.0  # Map row at the top edge of the view
+        self.scrollbars = (None, None)
+
+        # Model: color strings as given, plus palette indices for drawing images
+        self.fills = [[fill] * width for _ in range(height)]
+        self.palette = {}  # color -> index
+        self.palette_rgb = np.zeros((0, 3), dtype=np.uint8)
+        self.colors = np.full((height, width), self.color_index(fill), dtype=np.uint16)
+        self.levels = None  # Mipmaps of the cell colors, built the first time the view shows several cells per pixel
+        self.level_edits = set()  # Cells edited since the mipmaps were last brought up to date
+        self.texts = {}  # (row, col) -> text, only for cells showing one
+        self.text_source = None  # text_source(row, col) -> text for cells without one of their own
+        self.heatmap = None  # (height, width) float values drawn instead of the colors, inf where unset
+
+        self.dirty_fills = set()
+        self.dirty_texts = set()
+        self.view_changed = True
+        self.pending = None  # after() id of the scheduled flush
+        self.mode = None  # "items" or "image", whichever drew the last frame
+
+        self.pool = []  # (rect, text) item pairs, grown to cover the view at the smallest item zoom
+        self.slots = {}  # (row, col) -> pool index of the items showing that cell
+        self.image = tk.PhotoImage(master=canvas, width=view_width, height=view_height)
+        self.image_item = canvas.create_image(0, 0, image=self.image, anchor=tk.NW)
+        self.clamp_view()
+        self.schedule()
+
+    # Model
+
+    def color_index(self, color):
+        index = self.palette.get(color)
+        if index is None:
+            index = self.palette[color] = len(self.palette)
+            rgb = [channel >> 8 for channel in self.canvas.winfo_rgb(color)]
+            self.palette_rgb = np.vstack([self.palette_rgb, np.array(rgb, dtype=np.uint8)])
+        return index
+
+    def fill(self, row, col):
+        return self.fills[row][col]
+
+    def text(self, row, col):
+        text = self.texts.get((row, col), "")
+        if not text and self.text_source is not None:
+            return self.text_source(row, col)
+        return text
+
+    def set_fill(self, row, col, color):
+        if self.fills[row][col] != color:
+            self.fills[row][col] = color
+            self.colors[row, col] = self.color_index(color)
+            if self.levels is not None:
+                self.level_edits.add((row, col))
+            self.dirty_fills.add((row, col))
+            self.schedule()
+
+    def set_text(self, row, col, text):
+        if self.texts.get((row, col), "") != text:
+            if text:
+                self.texts[row, col] = text
+            else:
+                del self.texts[row, col]
+            self.dirty_texts.add((row, col))
+            self.schedule()
+
+    def fill_all(self, color):
+        self.set_fills([[color] * self.width for _ in range(self.height)])
+
+    def set_fills(self, colors):
+        """Replaces every fill from rows of colors."""
+        self.fills = [list(row) for row in colors]
+        index = self.color_index
+        self.colors = np.array([[index(color) for color in row] for row in self.fills], dtype=np.uint16)
+        self.levels = None
+        self.dirty_fills.clear()
+        self.view_changed = True
+        self.schedule()
+
+    def clear_texts(self):
+        self.dirty_texts.update(self.texts)
+        self.texts.clear()
+        self.set_text_source(None)
+
+    def set_text_source(self, source):
+        """Shows source(row, col) in the cells without a text of their own (None to stop)."""
+        if source is not None or self.text_source is not None:
+            self.text_source = source
+            self.view_changed = True
+        self.schedule()
+
+    def set_heatmap(self, values):
+        """Draws values (height x width, inf where unset) as one image over the cell colors; None to stop."""
+        self.heatmap = values
+        self.view_changed = True
+        self.schedule()
+
+    # Viewport
+
+    def cell_at(self, x, y):
+        """The (row, col) under a canvas pixel, or None outside the map."""
+        row = math.floor(self.y0 + y / self.zoom)
+        col = math.floor(self.x0 + x / self.zoom)
+        if 0 <= row < self.height and 0 <= col < self.width:
+            return row, col
+        return None
+
+    def visible(self):
+        """(top, left, bottom, right) of the visible cells, bottom and right exclusive."""
+        top = max(0, math.floor(self.y0))
+        left = max(0, math.floor(self.x0))
+        bottom = min(self.height, math.ceil(self.y0 + self.view_height / self.zoom))
+        right = min(self.width, math.ceil(self.x0 + self.view_width / self.zoom))
+        return top, left, bottom, right
+
+    def min_zoom(self):
+        """The zoom that fits the whole map in the view."""
+        return min(self.view_width / self.width, self.view_height / self.height, MAX_ZOOM)
+
+    def clamp_view(self):
+        self.zoom = min(max(self.zoom, self.min_zoom()), MAX_ZOOM)
+        self.x0 = min(max(self.x0, 0.0), max(0.0, self.width - self.view_width / self.zoom))
+        self.y0 = min(max(self.y0, 0.0), max(0.0, self.height - self.view_height / self.zoom))
+
+    def set_view(self, x0, y0, zoom=None):
+        if zoom is not None:
+            self.zoom = zoom
+        self.x0, self.y0 = x0, y0
+        self.clamp_view()
+        self.view_changed = True
+        self.schedule()
+
+    def zoom_at(self, factor, x, y):
+        """Zooms by factor keeping the map point under canvas pixel (x, y) in place."""
+        map_x = self.x0 + x / self.zoom
+        map_y = self.y0 + y / self.zoom
+        zoom = min(max(self.zoom * factor, self.min_zoom()), MAX_ZOOM)
+        self.set_view(map_x - x / zoom, map_y - y / zoom, zoom)
+
+    def on_wheel(self, event):
+        """Mouse wheel: <MouseWheel> carries a delta, X11 sends Button-4 (up) and Button-5 (down)."""
+        up = event.delta > 0 if getattr(event, "num", None) not in (4, 5) else event.num == 4
+        self.zoom_at(ZOOM_STEP if up else 1 / ZOOM_STEP, event.x, event.y)
+
+    def attach_scrollbars(self, horizontal, vertical):
+        self.scrollbars = (horizontal, vertical)
+        horizontal.config(command=self.xview)
+        vertical.config(command=self.yview)
+        self.view_changed = True
+        self.schedule()
+
+    def xview(self, *args):
+        self.set_view(self.scroll(self.x0, self.width, self.view_width / self.zoom, args), self.y0)
+
+    def yview(self, *args):
+        self.set_view(self.x0, self.scroll(self.y0, self.height, self.view_height / self.zoom, args))
+
+    @staticmethod
+    def scroll(position, total, shown, args):
+        """New first cell for a scrollbar command: ("moveto", fraction) or ("scroll", n, "units" | "pages")."""
+        if args[0] == "moveto":
+            return float(args[1]) * total
+        step = shown * (0.9 if args[2] == "pages" else 0.1)
+        return position + int(args[1]) * step
+
+    # Drawing
+
+    def schedule(self):
+        if self.pending is None and (self.dirty_fills or self.dirty_texts or self.view_changed):
+            self.pending = self.canvas.after(FRAME_MS, self.flush)
+
+    def flush(self):
+        """Draws every pending change now."""
+        if self.pending is not None:
+            self.canvas.after_cancel(self.pending)
+            self.pending = None
+        mode = "items" if self.zoom >= ITEM_ZOOM and not self.raster and self.heatmap is None else "image"
+        if mode != self.mode:
+            self.canvas.itemconfigure(self.image_item, state=tk.NORMAL if mode == "image" else tk.HIDDEN)
+            if mode == "image":
+                self.hide_slots(range(len(self.pool)))
+                self.slots = {}
+            self.mode = mode
+            self.view_changed = True
+
+        if mode == "items":
+            self.draw_items()
+        elif self.view_changed or self.dirty_fills:
+            top, left, bottom, right = self.visible()
+            if self.view_changed or any(top <= row < bottom and left <= col < right for row, col in self.dirty_fills):
+                self.draw_image()
+        if self.view_changed:
+            self.update_scrollbars()
+        self.dirty_fills.clear()
+        self.dirty_texts.clear()
+        self.view_changed = False
+
+    def draw_items(self):
+        canvas = self.canvas
+        if not self.view_changed:
+            # Only the changed cells that are on screen
+            fills, texts = [], []
+            for cell in self.dirty_fills:
+                if cell in self.slots:
+                    fills += (self.pool[self.slots[cell]][0], self.fills[cell[0]][cell[1]])
+            for cell in self.dirty_texts:
+                if cell in self.slots:
+                    texts += (self.pool[self.slots[cell]][1], self.text(*cell))
+            if fills:
+                canvas.tk.call("apply", CONFIGURE_ITEMS, str(canvas), "-fill", tuple(fills))
+            if texts:
+                canvas.tk.call("apply", CONFIGURE_ITEMS, str(canvas), "-text", tuple(texts))
+            return
+
+        top, left, bottom, right = self.visible()
+        needed = (bottom - top) * (right - left)
+        while len(self.pool) < needed:
+            self.pool.append((canvas.create_rectangle(0, 0, 0, 0, outline="black", state=tk.HIDDEN),
+                              canvas.create_text(0, 0, text="", font=TEXT_FONT, state=tk.HIDDEN)))
+        zoom = self.zoom
+        cells = []
+        self.slots = {}
+        slot = 0
+        text = self.text
+        for row in range(top, bottom):
+            y1 = (row - self.y0) * zoom
+            fills = self.fills[row]
+            for col in range(left, right):
+                x1 = (col - self.x0) * zoom
+                rect_item, text_item = self.pool[slot]
+                cells += (rect_item, text_item, x1, y1, x1 + zoom, y1 + zoom, fills[col], text(row, col))
+                self.slots[row, col] = slot
+                slot += 1
+        if cells:
+            canvas.tk.call("apply", PLACE_CELLS, str(canvas), tuple(cells))
+        self.hide_slots(range(needed, len(self.pool)))
+
+    def hide_slots(self, slots):
+        items = [item for slot in slots for item in self.pool[slot]]
+        if items:
+            self.canvas.tk.call("apply", HIDE_ITEMS, str(self.canvas), tuple(items))
+
+    def draw_image(self):
+        """Renders the view into the image: each pixel samples the cell (or mipmap block) under its center."""
+        zoom = self.zoom
+        rows = np.floor(self.y0 + (np.arange(self.view_height) + 0.5) / zoom).astype(np.int64)
+        cols = np.floor(self.x0 + (np.arange(self.view_width) + 0.5) / zoom).astype(np.int64)
+        outside_rows = rows >= self.height
+        outside_cols = cols >= self.width
+        rows = np.minimum(rows, self.height - 1)
+        cols = np.minimum(cols, self.width - 1)
+
+        level = 0 if zoom >= 1 else math.ceil(math.log2(1 / zoom))
+        if self.heatmap is not None:
+            pixels = self.heat_pixels(rows, cols)
+        elif level == 0:
+            pixels = self.palette_rgb[self.colors[np.ix_(rows, cols)]]
+        else:
+            self.update_levels()
+            level = min(level, len(self.levels) - 1)
+            pixels = self.levels[level][np.ix_(rows >> level, cols >> level)]
+        pixels[outside_rows] = BACKGROUND
+        pixels[:, outside_cols] = BACKGROUND
+
+        header = b"P6 %d %d 255\n" % (self.view_width, self.view_height)
+        self.image.tk.call(str(self.image), "put", header + pixels.tobytes(), "-format", "ppm")
+
+    def heat_pixels(self, rows, cols):
+        """Heatmap colors of the sampled cells, scaled between the smallest and largest finite value."""
+        values = self.heatmap[np.ix_(rows, cols)]
+        pixels = self.palette_rgb[self.colors[np.ix_(rows, cols)]]
+        finite = np.isfinite(values)
+        if finite.any():
+            low, high = values[finite].min(), values[finite].max()
+            scale = (values[finite] - low) / (high - low) if high > low else np.zeros(int(finite.sum()))
+            heat = HEAT_LOW + scale[:, None] * (HEAT_HIGH - HEAT_LOW)
+            # Blend over the cell colors so the map stays readable under the overlay
+            pixels[finite] = (0.7 * heat + 0.3 * pixels[finite]).astype(np.uint8)
+        return pixels
+
+    def update_levels(self):
+        """Builds the mipmaps, or patches the blocks above the cells edited since."""
+        if self.levels is None or len(self.level_edits) > LEVEL_REPAIRS:
+            self.levels = mipmaps(self.palette_rgb[self.colors])
+        else:
+            levels = self.levels
+            for row, col in self.level_edits:
+                levels[0][row, col] = self.palette_rgb[self.colors[row, col]]
+                for level in range(1, len(levels)):
+                    below = levels[level - 1]
+                    row, col = row >> 1, col >> 1
+                    # Children past an odd edge repeat the last row or column, as in mipmaps()
+                    rows = [2 * row, min(2 * row + 1, below.shape[0] - 1)]
+                    cols = [2 * col, min(2 * col + 1, below.shape[1] - 1)]
+                    block = below[np.ix_(rows, cols)].astype(np.uint16)
+                    levels[level][row, col] = (block.sum(axis=(0, 1)) + 2) // 4
+        self.level_edits.clear()
+
+    def update_scrollbars(self):
+        horizontal, vertical = self.scrollbars
+        if horizontal is not None:
+            horizontal.set(self.x0 / self.width, min(1.0, (self.x0 + self.view_width / self.zoom) / self.width))
+        if vertical is not None:
+            vertical.set(self.y0 / self.height, min(1.0, (self.y0 + self.view_height / self.zoom) / self.height))
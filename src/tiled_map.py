@@ -0,0 +1,288 @@
+"""Tiled map storage for city-scale grids: fixed-size tiles on disk, loaded on demand into an LRU cache.
+
+File layout (little endian):
+    magic        4s   b"GTIL"
+    version      H    FORMAT_VERSION
+    tile_size    I    tiles are tile_size x tile_size cells
+    width        Q
+    height       Q
+    data_offset  Q    byte offset of the first tile
+    tiles: uint8 cell classes, tile_size² bytes each, tile rows then tile columns;
+           border tiles are padded with WHITE
+"""
+import heapq
+import os
+import struct
+from collections import OrderedDict
+
+import numpy as np
+
+from astar import INF
+from grid_map import GREEN, WHITE, YELLOW, GridMap
+from map_io import load_map
+from planners import (neighbor_distance_cost_map, policy1_cost_map, policy2_cost_map,
+                      policy3_cost_map, policy4_cost_maps)
+from tracing import NULL_TRACER
+
+MAGIC = b"GTIL"
+FORMAT_VERSION = 1
+EXTENSION = ".gtil"
+HEADER = struct.Struct("<4sHIQQQ")
+ALIGNMENT = 4096  # Page aligned so each tile read starts on a page boundary when tile_size² is a page multiple
+
+
+def write_tiled_map(cells, path, tile_size=256):
+    """
+    Writes a (height, width) uint8 raster as tiles. cells may be a numpy.memmap: only one
+    band of tile_size rows is read into memory at a time.
+    """
+    height, width = cells.shape
+    tiles_x = -(-width // tile_size)
+    with open(path, "wb") as f:
+        f.write(HEADER.pack(MAGIC, FORMAT_VERSION, tile_size, width, height, ALIGNMENT))
+        f.write(b"\0" * (ALIGNMENT - HEADER.size))
+        for top in range(0, height, tile_size):
+            band = np.full((tile_size, tiles_x * tile_size), WHITE, dtype=np.uint8)
+            rows = np.asarray(cells[top:top + tile_size])
+            band[:rows.shape[0], :width] = rows
+            for tile_col in range(tiles_x):
+                f.write(band[:, tile_col * tile_size:(tile_col + 1) * tile_size].tobytes())
+
+
+def convert_to_tiles(source, destination=None, tile_size=256):
+    """Converts a binary .gmap map to the tiled format without loading it whole."""
+    if destination is None:
+        destination = os.path.splitext(source)[0] + EXTENSION
+    write_tiled_map(load_map(source, mode="r").cells, destination, tile_size)
+    return destination
+
+
+class LRUCache:
+    """Bounded mapping that evicts the least recently used entry; counts hits and misses."""
+
+    def __init__(self, max_entries, load):
+        self.max_entries = max_entries
+        self.load = load
+        self.entries = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key):
+        value = self.entries.get(key)
+        if value is not None:
+            self.hits += 1
+            self.entries.move_to_end(key)
+            return value
+        self.misses += 1
+        value = self.load(key)
+        self.entries[key] = value
+        if len(self.entries) > self.max_entries:
+            self.entries.popitem(last=False)
+        return value
+
+
+class TiledMap:
+    """Read-only view of a tiled map file. Tiles are read with os.pread when first needed."""
+
+    def __init__(self, path, cache_tiles=256):
+        self.path = path
+        with open(path, "rb") as f:
+            magic, version, tile_size, width, height, data_offset = HEADER.unpack(f.read(HEADER.size))
+        if magic != MAGIC:
+            raise ValueError(f"{path} is not a tiled grid map")
+        if version != FORMAT_VERSION:
+            raise ValueError(f"Unsupported tiled map version {version} in {path}")
+        self.tile_size = tile_size
+        self.width = width
+        self.height = height
+        self.data_offset = data_offset
+        self.tiles_x = -(-width // tile_size)
+        self.tiles_y = -(-height // tile_size)
+        self.fd = os.open(path, os.O_RDONLY)
+        self.tiles = LRUCache(cache_tiles, self.read_tile)
+
+    def close(self):
+        os.close(self.fd)
+
+    def read_tile(self, key):
+        """Reads one tile from disk as a (tile_size, tile_size) uint8 array."""
+        tile_row, tile_col = key
+        tile_bytes = self.tile_size * self.tile_size
+        offset = self.data_offset + (tile_row * self.tiles_x + tile_col) * tile_bytes
+        data = os.pread(self.fd, tile_bytes, offset)
+        return np.frombuffer(data, dtype=np.uint8).reshape(self.tile_size, self.tile_size)
+
+    def tile(self, tile_row, tile_col):
+        """Returns a tile through the LRU cache."""
+        return self.tiles.get((tile_row, tile_col))
+
+    def get(self, row, col):
+        """Returns the cell class at (row, col)."""
+        size = self.tile_size
+        return int(self.tile(row // size, col // size)[row % size, col % size])
+
+    def block(self, tile_row, tile_col, halo):
+        """Returns a tile with halo extra cells on every side (WHITE outside the map)."""
+        size = self.tile_size
+        block = np.full((size + 2 * halo, size + 2 * halo), WHITE, dtype=np.uint8)
+        top, left = tile_row * size - halo, tile_col * size - halo
+        for neighbor_row in range((top) // size, (top + size + 2 * halo - 1) // size + 1):
+            for neighbor_col in range(left // size, (left + size + 2 * halo - 1) // size + 1):
+                if not (0 <= neighbor_row < self.tiles_y and 0 <= neighbor_col < self.tiles_x):
+                    continue
+                tile = self.tile(neighbor_row, neighbor_col)
+                # Overlap of this tile with the block, in map coordinates
+                row0 = max(top, neighbor_row * size)
+                row1 = min(top + size + 2 * halo, (neighbor_row + 1) * size)
+                col0 = max(left, neighbor_col * size)
+                col1 = min(left + size + 2 * halo, (neighbor_col + 1) * size)
+                block[row0 - top:row1 - top, col0 - left:col1 - left] = \
+                    tile[row0 - neighbor_row * size:row1 - neighbor_row * size,
+                         col0 - neighbor_col * size:col1 - neighbor_col * size]
+        return block
+
+
+# Policy name -> how to compile one tile: cost layers from a block GridMap, the halo the
+# costs need around the tile, and the search options of planners.POLICY_ENGINES
+TILED_POLICIES = {
+    "policy1": {"costs": lambda m: [policy1_cost_map(m)], "halo": lambda: 0, "heuristic": True},
+    "neighbor_distance": {"costs": lambda m, d: [neighbor_distance_cost_map(m, d)], "halo": lambda d: d,
+                          "heuristic": True},
+    "policy2": {"costs": lambda m: [policy2_cost_map(m)], "halo": lambda: 3},  # Proximity tiers go up to 3
+    "policy3": {"costs": lambda m, k: [policy3_cost_map(m, k)], "halo": lambda k: k},
+    "policy4": {"costs": lambda m: list(policy4_cost_maps(m)), "halo": lambda: 0, "heuristic": True,
+                "layered": True, "tie_break": True, "relax_once": True},
+}
+
+
+class CompiledTile:
+    """
+    A tile's compiled arrays, held as flat memoryviews: indexing one returns a Python
+    scalar like a list would, while the tile keeps 4 bytes per cost (1 per layer and
+    gain) instead of a list of float objects.
+    """
+
+    def __init__(self, costs, layer, gain):
+        self.costs = [memoryview(np.ascontiguousarray(costs_layer, dtype=np.float32).ravel())
+                      for costs_layer in costs]  # Step costs per layer (exact: the costs are small integers)
+        self.layer = memoryview(layer.ravel()) if layer is not None else None  # Layer used when leaving each cell
+        self.gain = memoryview(gain.ravel()) if gain is not None else None  # Tie-break gains
+
+
+class TiledPlanner:
+    """
+    A* over a TiledMap with the same step costs and options as the in-memory engines.
+    Costs are compiled per tile (with the halo the policy needs) the first time the
+    search touches the tile and kept in a bounded LRU cache, so memory follows the
+    tiles under the open list, not the map size. g-costs and parents are sparse dicts.
+    """
+
+    def __init__(self, tiled_map, policy, *params, cache_tiles=256):
+        if policy not in TILED_POLICIES:
+            raise ValueError(f"Unknown policy: {policy}")
+        self.map = tiled_map
+        self.spec = TILED_POLICIES[policy]
+        self.params = params
+        self.halo = self.spec["halo"](*params)
+        if self.halo > tiled_map.tile_size:
+            raise ValueError("The policy's halo is larger than a tile")
+        self.compiled = LRUCache(cache_tiles, self.compile_tile)
+
+    def compile_tile(self, key):
+        halo = self.halo
+        block = self.map.block(key[0], key[1], halo)
+        block_map = GridMap.from_cells(block)
+        inner = (slice(halo, block.shape[0] - halo), slice(halo, block.shape[1] - halo))
+        costs = [layer[inner] for layer in self.spec["costs"](block_map, *self.params)]
+        cells = block[inner]
+        layer = (cells == YELLOW).astype(np.uint8) if self.spec.get("layered") else None
+        gain = (cells == GREEN).astype(np.uint8) if self.spec.get("tie_break") else None
+        return CompiledTile(costs, layer, gain)
+
+    def search(self, start, goal, tracer=NULL_TRACER):
+        """Searches between two (row, col) cells. Returns (cost, path cells with the start excluded)."""
+        with tracer.phase("search"):
+            return self._search(start, goal, tracer)
+
+    def _search(self, start, goal, tracer):
+        width, height = self.map.width, self.map.height
+        size = self.map.tile_size
+        compiled = self.compiled
+        use_heuristic = self.spec.get("heuristic", False)
+        layered = self.spec.get("layered", False)
+        tie_break = self.spec.get("tie_break", False)
+        relax_once = self.spec.get("relax_once", False)
+        tracing = tracer.enabled
+        goal_row, goal_col = goal
+
+        last_key = None
+        last_tile = None
+
+        def lookup(row, col):
+            """Compiled tile holding (row, col) and the cell's index in it."""
+            nonlocal last_key, last_tile
+            key = (row // size, col // size)
+            if key != last_key:
+                last_key, last_tile = key, compiled.get(key)
+            return last_tile, (row % size) * size + col % size
+
+        start_node = start[0] * width + start[1]
+        goal_node = goal_row * width + goal_col
+        g = {start_node: 0}
+        parent = {start_node: -1}
+        tie = {start_node: 0}
+        closed = set()
+        open_list = [(0, 0, start_node)] if tie_break else [(0, start_node)]
+
+        found = False
+        while open_list:
+            current = heapq.heappop(open_list)[-1]
+            if current in closed:
+                if tracing:
+                    tracer.on_stale(current)
+                continue
+            if current == goal_node:
+                found = True
+                break
+            closed.add(current)
+            if tracing:
+                tracer.on_expand(current, g[current])
+
+            row, col = divmod(current, width)
+            layer = 0
+            if layered:
+                tile, index = lookup(row, col)
+                layer = tile.layer[index]
+            current_g = g[current]
+
+            for neighbor_row, neighbor_col in ((row - 1, col), (row + 1, col), (row, col - 1), (row, col + 1)):
+                if not (0 <= neighbor_row < height and 0 <= neighbor_col < width):
+                    continue
+                neighbor = neighbor_row * width + neighbor_col
+                if relax_once and neighbor in g:
+                    continue
+                tile, index = lookup(neighbor_row, neighbor_col)
+                new_cost = current_g + tile.costs[layer][index]
+                if new_cost < g.get(neighbor, INF):
+                    g[neighbor] = new_cost
+                    parent[neighbor] = current
+                    priority = new_cost
+                    if use_heuristic:
+                        priority += abs(neighbor_row - goal_row) + abs(neighbor_col - goal_col)
+                    if tracing:
+                        tracer.on_relax(neighbor, current, new_cost, priority)
+                    if tie_break:
+                        tie[neighbor] = tie[current] + tile.gain[index]
+                        heapq.heappush(open_list, (priority, -tie[neighbor], neighbor))
+                    else:
+                        heapq.heappush(open_list, (priority, neighbor))
+
+        if not found:
+            return INF, []
+        path = []
+        node = goal_node
+        while node != start_node:
+            path.append(divmod(node, width))
+            node = parent[node]
+        path.reverse()
+        return g[goal_node], path
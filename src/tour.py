@@ -0,0 +1,184 @@
+"""Multi-goal tours: visit a set of waypoints in a cheap order under a policy's step costs."""
+import time
+
+import numpy as np
+
+from cost_field import CostField
+from tracing import NULL_TRACER
+
+INF = float('inf')
+TIME_BUDGET = 1.0  # Seconds for improving the visit order
+OR_OPT_LENGTHS = (1, 2, 3)  # Lengths of the waypoint runs Or-opt tries to move
+
+
+class Tour:
+    """A solved tour: the visit order, its total cost and the stitched path of every leg."""
+
+    def __init__(self, waypoints, order, cost, path, skipped):
+        self.waypoints = waypoints  # Every stop as given: start, waypoints..., end
+        self.order = order  # Indices into waypoints in visiting order
+        self.cost = cost
+        self.path = path  # (row, col) cells from the start to the last stop (start excluded)
+        self.skipped = skipped  # Waypoints not reachable from the start
+
+    @property
+    def stops(self):
+        """The stops as (row, col) cells in visiting order."""
+        return [self.waypoints[index] for index in self.order]
+
+
+def cost_matrix(engine, cells, tracer=NULL_TRACER):
+    """
+    Pairwise policy costs between cells with one full cost-field search per cell:
+    matrix[i, j] is the cost from cells[i] to cells[j] (inf if unreachable). Returns
+    (matrix, fields), the fields giving the path of every leg.
+    """
+    graph = engine.graph
+    fields = []
+    targets = np.array([graph.node(*cell) for cell in cells], dtype=np.int64)
+    matrix = np.empty((len(cells), len(cells)))
+    for index, cell in enumerate(cells):
+        source = graph.node(*cell)
+        g, parent = engine.cost_field(source, tracer=tracer)
+        field = CostField(graph, source, g, parent)
+        matrix[index] = np.frombuffer(g, dtype=np.float64)[targets]
+        fields.append(field)
+    return matrix, fields
+
+
+def order_cost(matrix, order):
+    return float(sum(matrix[a, b] for a, b in zip(order, order[1:])))
+
+
+def nearest_neighbor(matrix, start, end=None):
+    """Greedy visiting order from start: always the cheapest unvisited stop next, end (if any) last."""
+    remaining = set(range(len(matrix))) - {start, end}
+    order = [start]
+    while remaining:
+        current = order[-1]
+        following = min(remaining, key=lambda index: (matrix[current, index], index))
+        order.append(following)
+        remaining.discard(following)
+    if end is not None:
+        order.append(end)
+    return order
+
+
+def two_opt(matrix, order, fixed_end, deadline):
+    """
+    Reverses the order[i:j + 1] run with the largest gain, once. Costs may be
+    asymmetric, so the reversed run is priced with running sums of the costs along the
+    order in both directions. Returns the improved order or None.
+    """
+    count = len(order)
+    forward = np.concatenate([[0.0], np.cumsum([matrix[a, b] for a, b in zip(order, order[1:])])])
+    backward = np.concatenate([[0.0], np.cumsum([matrix[b, a] for a, b in zip(order, order[1:])])])
+    last = count - 1 if fixed_end else count
+    best_gain, best = 1e-9, None
+    for i in range(1, last):
+        if time.perf_counter() > deadline:
+            break
+        before = order[i - 1]
+        for j in range(i + 1, last):
+            after = order[j + 1] if j + 1 < count else None
+            old = matrix[before, order[i]] + forward[j] - forward[i]
+            new = matrix[before, order[j]] + backward[j] - backward[i]
+            if after is not None:
+                old += matrix[order[j], after]
+                new += matrix[order[i], after]
+            if old - new > best_gain:
+                best_gain, best = old - new, (i, j)
+    if best is None:
+        return None
+    i, j = best
+    return order[:i] + order[i:j + 1][::-1] + order[j + 1:]
+
+
+def or_opt(matrix, order, fixed_end, deadline):
+    """Moves the run of 1 to 3 stops with the largest gain elsewhere in the order, once. Returns the order or None."""
+    count = len(order)
+    last = count - 1 if fixed_end else count
+    best_gain, best = 1e-9, None
+    for length in OR_OPT_LENGTHS:
+        for i in range(1, last - length + 1):
+            if time.perf_counter() > deadline:
+                break
+            first, final = order[i], order[i + length - 1]
+            before = order[i - 1]
+            after = order[i + length] if i + length < count else None
+            removed = matrix[before, first]
+            if after is not None:
+                removed += matrix[final, after] - matrix[before, after]
+            # Insert between order[p] and order[p + 1], outside the run
+            for p in range(0, last):
+                if i - 1 <= p < i + length:
+                    continue
+                following = order[p + 1] if p + 1 < count else None
+                added = matrix[order[p], first]
+                if following is not None:
+                    added += matrix[final, following] - matrix[order[p], following]
+                if removed - added > best_gain:
+                    best_gain, best = removed - added, (i, length, p)
+    if best is None:
+        return None
+    i, length, p = best
+    run = order[i:i + length]
+    rest = order[:i] + order[i + length:]
+    position = p + 1 if p < i else p + 1 - length
+    return rest[:position] + run + rest[position:]
+
+
+def solve_order(matrix, start=0, end=None, time_budget=TIME_BUDGET):
+    """
+    Heuristic open-path TSP over a cost matrix: nearest neighbour from start, then the
+    best 2-opt or Or-opt move while one improves and the time budget lasts. start is
+    always first and end (if given) always last. Returns the order as a list of indices.
+    """
+    deadline = time.perf_counter() + time_budget
+    order = nearest_neighbor(matrix, start, end)
+    fixed_end = end is not None
+    while time.perf_counter() < deadline:
+        improved = two_opt(matrix, order, fixed_end, deadline) or or_opt(matrix, order, fixed_end, deadline)
+        if improved is None:
+            break
+        order = improved
+    return order
+
+
+def plan_tour(engine, start, waypoints, end=None, time_budget=TIME_BUDGET, tracer=NULL_TRACER):
+    """
+    Plans a tour from start through every waypoint (all (row, col) cells), finishing at
+    end if given, on a compiled engine (planners.engine_for). Builds the cost matrix with
+    one cost field per stop, orders the stops with solve_order and stitches the legs
+    into one path. Waypoints the start cannot reach are skipped.
+
+    Legs are the cost fields' optimal paths under the engine's step costs; Policy 4's
+    tie-break and no-revisit rules are not applied across or within legs.
+    """
+    stops = [tuple(start)] + [tuple(cell) for cell in waypoints] + ([tuple(end)] if end is not None else [])
+    matrix, fields = cost_matrix(engine, stops, tracer)
+
+    # Keep the stops the start reaches (reachability is symmetric on the grid)
+    reachable = [index for index in range(len(stops)) if matrix[0, index] != INF]
+    skipped = [stops[index] for index in range(len(stops)) if matrix[0, index] == INF]
+    end_index = len(stops) - 1 if end is not None and matrix[0, len(stops) - 1] != INF else None
+    sub_matrix = matrix[np.ix_(reachable, reachable)]
+    sub_order = solve_order(sub_matrix, 0, reachable.index(end_index) if end_index is not None else None, time_budget)
+    order = [reachable[index] for index in sub_order]
+
+    path = []
+    for a, b in zip(order, order[1:]):
+        path.extend(fields[a].path_to(stops[b]))
+    return Tour(stops, order, order_cost(matrix, order), path, skipped)
+
+
+def sample_waypoints(segments, spacing):
+    """Every spacing-th cell of each trajectory segment, plus the segment's last cell."""
+    waypoints = []
+    for segment in segments:
+        cells = list(segment)
+        if cells:
+            waypoints.extend(cells[::spacing])
+            if (len(cells) - 1) % spacing:
+                waypoints.append(cells[-1])
+    return waypoints
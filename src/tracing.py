@@ -0,0 +1,102 @@
+"""Opt-in instrumentation for the planners. The default NullTracer costs one flag check per event."""
+import time
+from contextlib import contextmanager
+
+
+class NullTracer:
+    """Ignores every event (the default)."""
+    enabled = False
+
+    def on_expand(self, node, g):
+        pass
+
+    def on_relax(self, node, parent, g, priority):
+        pass
+
+    def on_stale(self, node):
+        pass
+
+    @contextmanager
+    def phase(self, name):
+        yield
+
+
+NULL_TRACER = NullTracer()
+
+
+class CountingTracer(NullTracer):
+    """Counts nodes expanded, heap pushes and stale pops, and times each phase (compile, search, ...)."""
+    enabled = True
+
+    def __init__(self):
+        self.expanded = 0
+        self.pushes = 0
+        self.stale_pops = 0
+        self.phase_times = {}  # phase name -> accumulated wall time in seconds
+
+    def on_expand(self, node, g):
+        self.expanded += 1
+
+    def on_relax(self, node, parent, g, priority):
+        self.pushes += 1
+
+    def on_stale(self, node):
+        self.stale_pops += 1
+
+    @contextmanager
+    def phase(self, name):
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.phase_times[name] = self.phase_times.get(name, 0.0) + time.perf_counter() - started
+
+    def summary(self):
+        """Returns the counters as a plain dict."""
+        return {
+            "expanded": self.expanded,
+            "pushes": self.pushes,
+            "stale_pops": self.stale_pops,
+            "phase_times": dict(self.phase_times),
+        }
+
+
+class EventTracer(CountingTracer):
+    """Counts like CountingTracer and also records every event as a tuple in self.events."""
+
+    def __init__(self):
+        super().__init__()
+        self.events = []
+
+    def on_expand(self, node, g):
+        super().on_expand(node, g)
+        self.events.append(("expand", node, g))
+
+    def on_relax(self, node, parent, g, priority):
+        super().on_relax(node, parent, g, priority)
+        self.events.append(("relax", node, parent, g, priority))
+
+    def on_stale(self, node):
+        super().on_stale(node)
+        self.events.append(("stale", node))
+
+
+class PlanCancelled(Exception):
+    """Raised from inside a search traced by a cancelled ProgressTracer."""
+
+
+class ProgressTracer(CountingTracer):
+    """
+    Counts like CountingTracer for a search running on another thread, which reads
+    expanded as progress. Setting cancelled stops the search at its next expansion
+    with PlanCancelled.
+    """
+
+    def __init__(self):
+        super().__init__()
+        self.cancelled = False
+
+    def on_expand(self, node, g):
+        if self.cancelled:
+            raise PlanCancelled()
+        self.expanded += 1
@@ -0,0 +1,200 @@
+"""Compact trajectories: flat cell indices in an array('i'), with optional run-length direction codes."""
+import struct
+from array import array
+
+MAGIC = b"TRAJ"
+RAW = 0
+RUNS = 1
+HEADER = struct.Struct("<4sBIQ")  # magic, encoding, width, number of cells
+
+# Direction code -> (row step, col step), in the order of GridGraph.neighbors
+DIRECTIONS = ((-1, 0), (1, 0), (0, -1), (0, 1))
+MAX_RUN = (1 << 14) - 1  # A run is packed as length << 2 | direction in 16 bits
+
+
+class Trajectory:
+    """
+    A sequence of (row, col) cells stored as flat indices (row * width + col), 4 bytes
+    per cell instead of a tuple each. Indexing and iteration yield (row, col) tuples,
+    as play_trajectory expects; slicing returns a Trajectory over a memoryview of the
+    same buffer (no copy). Only a trajectory that owns its array can grow, and only
+    while no slice of it is alive.
+    """
+
+    __slots__ = ("width", "nodes")
+
+    def __init__(self, width, nodes=None):
+        self.width = width
+        if nodes is None:
+            nodes = array('i')
+        elif not isinstance(nodes, (array, memoryview)):
+            nodes = array('i', nodes)
+        self.nodes = nodes
+
+    @classmethod
+    def from_cells(cls, width, cells):
+        """Builds a trajectory from (row, col) tuples."""
+        return cls(width, array('i', [row * width + col for row, col in cells]))
+
+    def cells(self):
+        """The trajectory as a list of (row, col) tuples."""
+        width = self.width
+        return [divmod(node, width) for node in self.nodes]
+
+    def __len__(self):
+        return len(self.nodes)
+
+    def __iter__(self):
+        width = self.width
+        for node in self.nodes:
+            yield divmod(node, width)
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return Trajectory(self.width, memoryview(self.nodes)[index])
+        return divmod(self.nodes[index], self.width)
+
+    def __eq__(self, other):
+        if isinstance(other, Trajectory):
+            return self.width == other.width and self.nodes.tolist() == other.nodes.tolist()
+        return self.cells() == list(other)
+
+    def __repr__(self):
+        return f"Trajectory({self.cells()!r})"
+
+    def append(self, cell):
+        self.nodes.append(cell[0] * self.width + cell[1])
+
+    def extend(self, cells):
+        width = self.width
+        self.nodes.extend(row * width + col for row, col in cells)
+
+    def reverse(self):
+        self.nodes.reverse()
+
+    def clear(self):
+        del self.nodes[:]
+
+    def copy(self):
+        """A trajectory owning a copy of the cells (for example to keep a slice after its source changes)."""
+        return Trajectory(self.width, array('i', self.nodes))
+
+    def runs(self):
+        """
+        Run-length direction codes of a 4-connected trajectory: a list of (direction,
+        length) pairs, direction indexing DIRECTIONS. Raises ValueError if two
+        consecutive cells are not neighbors.
+        """
+        width = self.width
+        runs = []
+        nodes = self.nodes
+        for index in range(1, len(nodes)):
+            row, col = divmod(nodes[index - 1], width)
+            next_row, next_col = divmod(nodes[index], width)
+            try:
+                direction = DIRECTIONS.index((next_row - row, next_col - col))
+            except ValueError:
+                raise ValueError(f"Cells {index - 1} and {index} of the trajectory are not neighbors") from None
+            if runs and runs[-1][0] == direction:
+                runs[-1][1] += 1
+            else:
+                runs.append([direction, 1])
+        return [(direction, length) for direction, length in runs]
+
+    @classmethod
+    def from_runs(cls, width, first, runs):
+        """Rebuilds a trajectory from its first flat index and run-length direction codes."""
+        nodes = array('i', [first])
+        node = first
+        for direction, length in runs:
+            row_step, col_step = DIRECTIONS[direction]
+            step = row_step * width + col_step
+            for _ in range(length):
+                node += step
+                nodes.append(node)
+        return cls(width, nodes)
+
+    def to_bytes(self, encoding=None):
+        """
+        Serializes the trajectory. encoding is RAW (4 bytes per cell) or RUNS (2 bytes
+        per straight run, 4-connected trajectories only); by default RUNS is used when
+        the trajectory is 4-connected.
+        """
+        if encoding != RAW and len(self.nodes):
+            try:
+                runs = self.runs()
+            except ValueError:
+                if encoding == RUNS:
+                    raise
+            else:
+                codes = array('H')
+                for direction, length in runs:
+                    while length:
+                        part = min(length, MAX_RUN)
+                        codes.append(part << 2 | direction)
+                        length -= part
+                return (HEADER.pack(MAGIC, RUNS, self.width, len(self.nodes))
+                        + struct.pack("<i", self.nodes[0]) + codes.tobytes())
+        return HEADER.pack(MAGIC, RAW, self.width, len(self.nodes)) + array('i', self.nodes).tobytes()
+
+    @classmethod
+    def from_bytes(cls, data):
+        """Reads a trajectory written by to_bytes."""
+        magic, encoding, width, count = HEADER.unpack_from(data)
+        if magic != MAGIC:
+            raise ValueError("Not a serialized trajectory")
+        body = memoryview(data)[HEADER.size:]
+        if encoding == RAW:
+            nodes = array('i')
+            nodes.frombytes(body[:4 * count])
+            return cls(width, nodes)
+        if encoding == RUNS:
+            if count == 0:
+                return cls(width)
+            first, = struct.unpack_from("<i", body)
+            codes = array('H')
+            codes.frombytes(body[4:])
+            return cls.from_runs(width, first, [(code & 3, code >> 2) for code in codes])
+        raise ValueError(f"Unknown trajectory encoding {encoding}")
+
+
+def order_segments(cells, start=None):
+    """
+    Orders the unordered cells of a painted trajectory into walks of 4-neighbors. The
+    first walk starts at start (default: the first cell); when a walk reaches a dead
+    end or a branch is left behind, the next walk starts at the far end of a remaining
+    piece. Returns a list of segments, each a list of (row, col) tuples. Cells are
+    looked up in a set, so the whole ordering is O(n).
+    """
+    remaining = set(cells)
+    segments = []
+    if not remaining:
+        return segments
+
+    def next_cell(cell, visited):
+        row, col = cell
+        # Row-major neighbor order: up, left, right, down
+        for neighbor in ((row - 1, col), (row, col - 1), (row, col + 1), (row + 1, col)):
+            if neighbor in remaining and neighbor not in visited:
+                return neighbor
+        return None
+
+    def walk(cell):
+        segment = [cell]
+        remaining.discard(cell)
+        while (cell := next_cell(cell, ())) is not None:
+            segment.append(cell)
+            remaining.discard(cell)
+        return segment
+
+    segments.append(walk(tuple(start) if start is not None and tuple(start) in remaining else cells[0]))
+    for cell in cells:
+        if cell not in remaining:
+            continue
+        # Run to one end of this piece first so it comes out as a single segment
+        visited = {cell}
+        while (following := next_cell(cell, visited)) is not None:
+            cell = following
+            visited.add(cell)
+        segments.append(walk(cell))
+    return segments
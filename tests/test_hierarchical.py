@@ -0,0 +1,33 @@
+"""HPA* queries whose start and goal sit on opposite sides of a sector border."""
+import os
+import sys
+
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "src"))
+
+from grid_map import GREEN, YELLOW, GridMap  # noqa: E402
+from hierarchical import HierarchicalPlanner  # noqa: E402
+from planners import engine_for  # noqa: E402
+
+
+def test_start_entrance_crosses_border():
+    grid_map = GridMap(3, 5, fill=YELLOW)
+    for gap in (None, 0.5):
+        planner = HierarchicalPlanner(grid_map, "policy4", sector_size=4, gap=gap)
+        assert planner.plan((3, 1), (4, 1)) == (200, [(4, 1)])
+        assert planner.plan((4, 1), (3, 1)) == (200, [(3, 1)])
+
+
+def test_border_pairs_match_astar():
+    rng = np.random.default_rng(0)
+    grid_map = GridMap(12, 12)
+    grid_map.load_cells(rng.choice([0, GREEN, YELLOW], size=(12, 12)).astype(np.uint8))
+    engine = engine_for(grid_map, "policy1")
+    planner = HierarchicalPlanner(grid_map, "policy1", sector_size=4, gap=0)
+    for row in range(12):
+        for start, goal in (((row, 3), (row, 4)), ((row, 4), (row, 3)), ((3, row), (4, row))):
+            cost, path = planner.plan(start, goal)
+            expected = engine.search(engine.graph.node(*start), engine.graph.node(*goal)).cost
+            assert cost == expected
+            assert path[-1] == goal